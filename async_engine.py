@@ -0,0 +1,290 @@
+import asyncio
+import contextvars
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+import telegram
+
+import circuit_breaker
+import engine
+from error_notifier import ErrorNotifier
+import exceptions
+import history
+import homework
+import http_pool
+import logging_setup
+import metrics
+import rendering
+import routing
+import scheduler
+import shutdown
+import state_store
+import webhook
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+load_dotenv()
+
+HTTP2 = importlib.util.find_spec('h2') is not None
+CLIENT_ERRORS = (OSError, asyncio.TimeoutError)
+if httpx is not None:
+    CLIENT_ERRORS += (httpx.HTTPError,)
+
+
+ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 100))
+
+ASYNC_ENGINE_STARTED = ('Асинхронный движок запущен, подписок - {}, '
+                        'одновременных запросов - {}, клиент - {}')
+
+
+class AsyncPollingEngine:
+    """.
+    Асинхронно опрашивает API для всех подписок. Запросы к API и отправка
+    сообщений для разных подписок перекрываются, число одновременных
+    операций ограничено concurrency.
+    """
+
+    def __init__(self, registry, bot, store=None,
+                 interval=homework.RETRY_PERIOD,
+                 concurrency=ASYNC_CONCURRENCY, client=None, scheduler=None,
+                 breaker=None, renderer=None, router=None, history=None):
+        self.registry = registry
+        self.bot = bot
+        self.renderer = renderer or rendering.get_renderer()
+        self.router = router or routing.Router(bot)
+        self.history = history
+        self.store = store or state_store.MemoryStateStore()
+        self.scheduler = scheduler
+        self.breaker = breaker or circuit_breaker.for_endpoint(
+            homework.ENDPOINT)
+        self.notifier = ErrorNotifier(homework.MAIN)
+        self.interval = interval
+        self.concurrency = concurrency
+        self.client = client
+        self._semaphore = None
+        self._stopped = None
+        self._tasks = {}
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def _in_thread(self, func, *args):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, context.run,
+                                          func, *args)
+
+    async def request_statuses(self, headers, timestamp):
+        """Асинхронный аналог homework.request_statuses с предохранителем."""
+        self.breaker.before_call()
+        try:
+            response = await self._request_statuses(headers, timestamp)
+        except Exception as error:
+            self.breaker.record(error)
+            raise
+        self.breaker.record_success()
+        return response
+
+    async def _request_statuses(self, headers, timestamp):
+        if self.client is None:
+            return await self._in_thread(homework.request_statuses,
+                                         headers, timestamp)
+        payload = {'from_date': timestamp}
+        started = time.monotonic()
+        try:
+            response_from_api = await self.client.get(
+                homework.ENDPOINT, headers=headers, params=payload,
+                timeout=homework.REQUEST_TIMEOUT)
+        except CLIENT_ERRORS as error:
+            metrics.API_REQUESTS.inc('error')
+            raise ConnectionError(homework.GET_API_ANSWER.format(
+                error, homework.ENDPOINT, homework.mask_headers(headers),
+                payload))
+        homework.observe_api_response(response_from_api, started)
+        return homework.check_api_reply(response_from_api, headers, payload)
+
+    async def send_to_chat(self, chat_id, message):
+        """Отправляет сообщение, не блокируя цикл событий."""
+        return await self._in_thread(homework.send_to_chat, self.bot,
+                                     chat_id, message)
+
+    async def poll(self, subscription):
+        """.
+        Выполняет один цикл опроса для подписки, возвращает True, если
+        было отправлено уведомление о смене статуса.
+        """
+        async with self._semaphore:
+            try:
+                response = await self.request_statuses(
+                    subscription.headers, subscription.timestamp)
+                self.notifier.resolve(subscription.chat_id)
+                names = {}
+                statuses = self.store.get_statuses(subscription.key)
+                changes, message = homework.prepare_update(
+                    response, statuses,
+                    self.renderer.for_locale(subscription.locale), names)
+                if message is None:
+                    return False
+                self.router.send(subscription, message, changes)
+                if await self.send_to_chat(subscription.chat_id, message):
+                    self.router.delivered(subscription)
+                    subscription.timestamp = response.get(
+                        'current_date', subscription.timestamp)
+                    self.store.record(subscription.key,
+                                      subscription.timestamp, changes, names)
+                    if self.history is not None and statuses:
+                        self.history.append(subscription.key, changes,
+                                            names=names)
+                    return True
+            except exceptions.CircuitOpenException as error:
+                logging.warning(engine.POLL_ERROR.format(subscription.key,
+                                                         error))
+            except Exception as error:
+                logging.error(engine.POLL_ERROR.format(subscription.key,
+                                                       error))
+                await self._in_thread(
+                    self.notifier.notify, subscription.chat_id, error,
+                    partial(homework.send_to_chat, self.bot,
+                            subscription.chat_id))
+            return False
+
+    next_delay = engine.PollingEngine.next_delay
+
+    async def _watch(self, subscription):
+        subscription.timestamp = self.store.get_cursor(
+            subscription.key, subscription.timestamp)
+        while (not self._stopped.is_set()
+               and subscription.key in self.registry):
+            started = time.monotonic()
+            with logging_setup.log_context(
+                    tenant=subscription.key,
+                    request_id=logging_setup.new_request_id()):
+                changed = await self.poll(subscription)
+            metrics.LOOP_SECONDS.observe(time.monotonic() - started)
+            self.store.maybe_flush()
+            try:
+                await asyncio.wait_for(self._stopped.wait(),
+                                       self.next_delay(subscription, changed))
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll_all(self):
+        """Один раз опрашивает все подписки конкурентно."""
+        self._prepare()
+        await asyncio.gather(*(self.poll(sub) for sub in self.registry))
+
+    def sync(self):
+        """Запускает наблюдение за подписками, добавленными в реестр."""
+        for subscription in self.registry:
+            if subscription.key not in self._tasks:
+                task = asyncio.create_task(self._watch(subscription))
+                task.add_done_callback(
+                    partial(self._finished, subscription.key))
+                self._tasks[subscription.key] = task
+
+    def _finished(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def run(self):
+        """.
+        Опрашивает подписки до вызова stop(), затем дожидается
+        завершения начатых опросов.
+        """
+        self._prepare()
+        try:
+            self.sync()
+            await self._stopped.wait()
+            await asyncio.gather(*self._tasks.values())
+        finally:
+            self._executor.shutdown(wait=False)
+            self.router.close()
+            self.store.flush()
+
+    def stop(self):
+        """Останавливает опрос."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def _prepare(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._stopped = asyncio.Event()
+
+
+def make_scheduler():
+    """Создаёт адаптивный планировщик с базовым интервалом бота."""
+    return scheduler.AdaptiveScheduler(homework.RETRY_PERIOD)
+
+
+def add_signal_handlers(poller):
+    """.
+    Останавливает движок по SIGTERM/SIGINT и перечитывает подписки
+    по SIGHUP.
+    """
+    shutdown.add_async_handlers(
+        asyncio.get_running_loop(), poller.stop,
+        partial(engine.reload_subscriptions, poller.registry, poller.sync))
+
+
+async def serve(registry, bot, store, statuses=None):
+    """Запускает асинхронный движок с HTTP-клиентом, если он доступен."""
+    if httpx is None:
+        http_pool.enable(maxsize=ASYNC_CONCURRENCY)
+        poller = AsyncPollingEngine(registry, bot, store,
+                                    scheduler=make_scheduler(),
+                                    history=statuses)
+        logging.info(ASYNC_ENGINE_STARTED.format(
+            len(registry), poller.concurrency, 'requests'))
+        add_signal_handlers(poller)
+        try:
+            await poller.run()
+        finally:
+            http_pool.disable()
+        return
+    limits = httpx.Limits(max_connections=ASYNC_CONCURRENCY,
+                          max_keepalive_connections=http_pool.POOL_MAXSIZE,
+                          keepalive_expiry=http_pool.POOL_IDLE_TIMEOUT)
+    async with httpx.AsyncClient(limits=limits, http2=HTTP2) as client:
+        poller = AsyncPollingEngine(registry, bot, store, client=client,
+                                    scheduler=make_scheduler(),
+                                    history=statuses)
+        logging.info(ASYNC_ENGINE_STARTED.format(
+            len(registry), poller.concurrency, 'httpx'))
+        add_signal_handlers(poller)
+        await poller.run()
+
+
+def main():
+    """Запускает асинхронный опрос всех подписок."""
+    registry = engine.load_subscriptions()
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    store = state_store.open_store(homework.STATE_STORE_PATH)
+    statuses = history.open_history()
+    metrics.serve()
+    receiver = webhook.serve(registry, store, bot, history=statuses)
+    try:
+        asyncio.run(serve(registry, bot, store, statuses))
+    finally:
+        if receiver is not None:
+            receiver.stop()
+        store.close()
+        if statuses is not None:
+            statuses.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(levelname)s - %(name)s - %(funcName)s - '
+               '%(lineno)s - %(message)s',
+        handlers=logging_setup.queue_handlers(__file__ + '.log')
+    )
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+
+try:
+    from pytest_benchmark.utils import parse_compare_fail
+except ImportError:
+    parse_compare_fail = None
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'tests'))
+
+from tests.fixtures.fixture_data import (  # noqa: E402,F401
+    homework_module, random_timestamp)
+
+DEFAULT_STORAGE = 'file://./.benchmarks'
+BASELINE_STORAGE = 'file://' + os.path.join(BENCHMARKS_DIR, '.baselines')
+REGRESSION_THRESHOLD = os.getenv('BENCHMARK_THRESHOLD', 'median:20%')
+
+
+def pytest_configure(config):
+    """.
+    Хранит базовые замеры в benchmarks/.baselines и при сравнении с ними
+    по умолчанию падает, если медиана времени выросла больше чем на
+    BENCHMARK_THRESHOLD.
+    """
+    if parse_compare_fail is None:
+        return
+    option = config.option
+    if getattr(option, 'benchmark_storage', None) == DEFAULT_STORAGE:
+        option.benchmark_storage = BASELINE_STORAGE
+    if (getattr(option, 'benchmark_compare', None)
+            and not option.benchmark_compare_fail):
+        option.benchmark_compare_fail = [
+            parse_compare_fail(REGRESSION_THRESHOLD)]
@@ -0,0 +1,30 @@
+import json
+
+import requests
+
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+SIZES = (10, 1000, 10000)
+
+
+def make_homeworks(count):
+    return [
+        {'id': index, 'status': STATUSES[index % len(STATUSES)],
+         'homework_name': f'student__hw{index:05d}.zip',
+         'reviewer_comment': 'Замечаний нет. ' * 5,
+         'date_updated': '2024-01-01T00:00:00Z',
+         'lesson_name': f'Спринт {index % 20}'}
+        for index in range(count, 0, -1)
+    ]
+
+
+def make_response(count, current_date=1700000000):
+    return {'homeworks': make_homeworks(count), 'current_date': current_date}
+
+
+def make_http_response(count):
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response._content = json.dumps(make_response(count)).encode()
+    return response
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+import payloads
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.mark.parametrize('size', payloads.SIZES)
+def test_check_response(benchmark, homework_module, size):
+    response = payloads.make_response(size)
+    homeworks = benchmark(homework_module.check_response, response)
+    assert len(homeworks) == size
+
+
+def test_parse_status(benchmark, homework_module):
+    homework = payloads.make_homeworks(1)[0]
+    message = benchmark(homework_module.parse_status, homework)
+    assert homework['homework_name'] in message
+
+
+def test_render_cached_template(benchmark):
+    from models import Homework
+    import rendering
+
+    renderer = rendering.MessageRenderer()
+    homework = Homework.from_api(payloads.make_homeworks(1)[0])
+    message = benchmark(renderer.render, homework)
+    assert homework.name in message
+
+
+def test_homework_key(benchmark):
+    from models import Homework
+
+    homework = payloads.make_homeworks(1)[0]
+    key = benchmark(lambda: Homework.from_api(homework).key)
+    assert key == str(homework['id'])
+
+
+@pytest.mark.parametrize('size', payloads.SIZES)
+def test_prepare_update_without_changes(benchmark, homework_module, size):
+    from models import Homework
+
+    response = payloads.make_response(size)
+    sent = {Homework.from_api(homework).key: homework['status']
+            for homework in response['homeworks']}
+    changes, message = benchmark(homework_module.prepare_update,
+                                 response, sent)
+    assert message is None
+
+
+@pytest.mark.parametrize('size', payloads.SIZES)
+def test_prepare_update_all_changed(benchmark, homework_module, size):
+    response = payloads.make_response(size)
+    changes, message = benchmark(homework_module.prepare_update,
+                                 response, {})
+    assert len(changes) == size
+
+
+@pytest.mark.parametrize('size', payloads.SIZES)
+def test_json_loads(benchmark, size):
+    body = json.dumps(payloads.make_response(size)).encode()
+    data = benchmark(json.loads, body)
+    assert len(data['homeworks']) == size
+
+
+@pytest.mark.parametrize('size', payloads.SIZES)
+def test_response_json(benchmark, size):
+    response = payloads.make_http_response(size)
+    data = benchmark(response.json)
+    assert len(data['homeworks']) == size
+
+
+@pytest.mark.parametrize('size', payloads.SIZES)
+def test_decode_statuses(benchmark, size):
+    import fast_json
+
+    body = json.dumps(payloads.make_response(size)).encode()
+    data = benchmark(fast_json.decode_statuses, body)
+    assert len(data['homeworks']) == size
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+import requests
+import telegram
+
+import payloads
+import utils
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture
+def mocked_main(monkeypatch, homework_module):
+    """.
+    Подменяет сеть, бота и паузу так, что main() выполняет ровно одну
+    итерацию цикла.
+    """
+    def sleep_to_interrupt(secs):
+        raise utils.BreakInfiniteLoop('break')
+
+    def get_with_payload(size):
+        def mocked_get(*args, **kwargs):
+            response = utils.MockResponseGET(*args, **kwargs)
+            response.json = lambda: payloads.make_response(size)
+            return response
+        return mocked_get
+
+    monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+    monkeypatch.setattr(telegram, 'Bot', utils.MockTelegramBot)
+    monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
+    monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abcdefg')
+    monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+    monkeypatch.setattr(homework_module, 'STATE_STORE_PATH', None)
+
+    def iteration(size):
+        monkeypatch.setattr(requests, 'get', get_with_payload(size))
+
+        def run():
+            try:
+                homework_module.main()
+            except utils.BreakInfiniteLoop:
+                pass
+        return run
+    return iteration
+
+
+@pytest.mark.parametrize('size', (1, 100))
+def test_main_iteration(benchmark, mocked_main, size):
+    benchmark(mocked_main(size))
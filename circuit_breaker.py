@@ -0,0 +1,159 @@
+from email.utils import parsedate_to_datetime
+import os
+import threading
+import time
+
+import exceptions
+
+
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', 3))
+BREAKER_BASE_DELAY = int(os.getenv('BREAKER_BASE_DELAY', 60))
+BREAKER_MAX_DELAY = int(os.getenv('BREAKER_MAX_DELAY', 3600))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+CIRCUIT_OPEN = 'API недоступен, следующая попытка через {:.0f} с.'
+CIRCUIT_PROBING = 'API проверяется пробным запросом'
+
+FAILURES = (ConnectionError, exceptions.ServerErrorException)
+
+
+def parse_retry_after(value, now=time.time):
+    """.
+    Разбирает заголовок Retry-After в секундах или HTTP-дате,
+    возвращает число секунд или None.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """.
+    Предохранитель для запросов к API. После failure_threshold сбоев
+    подряд размыкается и отклоняет запросы, выдерживая экспоненциально
+    растущую паузу (не меньше Retry-After от сервера). Затем пропускает
+    один пробный запрос: успех замыкает цепь, сбой снова размыкает её.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES,
+                 base_delay=BREAKER_BASE_DELAY, max_delay=BREAKER_MAX_DELAY,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.failures = 0
+        self.trips = 0
+        self._state = CLOSED
+        self._opened_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Текущее состояние: closed, open или half_open."""
+        with self._lock:
+            if self._state == OPEN and self.clock() >= self._opened_until:
+                return HALF_OPEN
+            return self._state
+
+    def retry_after(self):
+        """Возвращает число секунд до пробного запроса, 0 если замкнут."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(self._opened_until - self.clock(), 0.0)
+
+    def before_call(self):
+        """Пропускает запрос или бросает CircuitOpenException."""
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_until - self.clock()
+                if remaining > 0:
+                    raise exceptions.CircuitOpenException(
+                        CIRCUIT_OPEN.format(remaining), remaining)
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    raise exceptions.CircuitOpenException(
+                        CIRCUIT_PROBING, self.base_delay)
+                self._probing = True
+
+    def record_success(self):
+        """Замыкает цепь после успешного ответа API."""
+        with self._lock:
+            self.failures = 0
+            self.trips = 0
+            self._probing = False
+            self._state = CLOSED
+
+    def record_failure(self, retry_after=None):
+        """.
+        Учитывает сбой и размыкает цепь, если замкнутая цепь набрала
+        порог сбоев или не удался пробный запрос. Сбои запросов, начатых
+        до размыкания, только считаются и продлевают паузу лишь до
+        большего Retry-After.
+        """
+        with self._lock:
+            self.failures += 1
+            if self._state == OPEN or (self._state == HALF_OPEN
+                                       and not self._probing):
+                if retry_after is not None:
+                    self._state = OPEN
+                    self._opened_until = max(self._opened_until,
+                                             self.clock() + retry_after)
+                return
+            if (self._state == CLOSED
+                    and self.failures < self.failure_threshold
+                    and retry_after is None):
+                return
+            self._probing = False
+            self.trips += 1
+            delay = min(self.base_delay * 2 ** (self.trips - 1),
+                        self.max_delay)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            self._state = OPEN
+            self._opened_until = self.clock() + delay
+
+    def record(self, error):
+        """Учитывает исход запроса по исключению (None - успех)."""
+        if isinstance(error, FAILURES):
+            self.record_failure(getattr(error, 'retry_after', None))
+        else:
+            self.record_success()
+
+    def call(self, func, *args):
+        """Вызывает func через предохранитель."""
+        self.before_call()
+        try:
+            result = func(*args)
+        except Exception as error:
+            self.record(error)
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def for_endpoint(endpoint):
+    """Возвращает общий для всех подписок предохранитель эндпоинта."""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[endpoint] = breaker
+        return breaker
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+
+import homework
+
+
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))
+
+
+class _Digest:
+    """Уведомления одного чата, накопленные за окно."""
+
+    __slots__ = ('due', 'texts', 'callbacks', 'length')
+
+    def __init__(self, due):
+        self.due = due
+        self.texts = []
+        self.callbacks = []
+        self.length = 0
+
+
+class _Delivery:
+    """Собирает итоги отправки частей дайджеста и сообщает их уведомлениям."""
+
+    def __init__(self, callbacks, pending):
+        self.callbacks = callbacks
+        self.pending = pending
+        self.sent = True
+        self._lock = threading.Lock()
+
+    def done(self, sent):
+        with self._lock:
+            self.sent = self.sent and sent
+            self.pending -= 1
+            if self.pending:
+                return
+        for callback in self.callbacks:
+            callback(self.sent)
+
+
+class DigestQueue:
+    """.
+    Копит уведомления для каждого чата не дольше window секунд с первого
+    из них и передаёт их в очередь отправки одним сообщением, разбитым по
+    лимиту длины Telegram. Интерфейс совпадает с OutboundQueue, поэтому
+    дайджест подключается к движку вместо очереди.
+    """
+
+    def __init__(self, outbox, window=DIGEST_WINDOW,
+                 max_length=homework.MAX_MESSAGE_LENGTH, clock=time.monotonic):
+        self.outbox = outbox
+        self.window = window
+        self.max_length = max_length
+        self.clock = clock
+        self.counters = dict.fromkeys(('notifications', 'digests',
+                                       'messages'), 0)
+        self._digests = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def submit(self, chat_id, text, callback=None):
+        """.
+        Добавляет уведомление в дайджест чата. callback(sent) будет вызван
+        после отправки всего дайджеста. Дайджест, переросший лимит длины,
+        уходит сразу.
+        """
+        with self._lock:
+            self.counters['notifications'] += 1
+            digest = self._digests.get(chat_id)
+            if digest is None:
+                digest = _Digest(self.clock() + self.window)
+                self._digests[chat_id] = digest
+                self._wakeup.set()
+            digest.texts.append(text)
+            if callback is not None:
+                digest.callbacks.append(callback)
+            digest.length += len(text) + len(homework.UPDATE_SEPARATOR)
+            if digest.length < self.max_length:
+                return True
+            del self._digests[chat_id]
+        self._send(chat_id, digest)
+        return True
+
+    def flush(self, now=None):
+        """.
+        Отправляет дайджесты, окно которых истекло к моменту now, а без
+        now - все. Возвращает время ожидания до следующего окна или None.
+        """
+        with self._lock:
+            due = [(chat_id, digest)
+                   for chat_id, digest in self._digests.items()
+                   if now is None or digest.due <= now]
+            for chat_id, _ in due:
+                del self._digests[chat_id]
+            next_due = min((digest.due for digest in self._digests.values()),
+                           default=None)
+        for chat_id, digest in due:
+            self._send(chat_id, digest)
+        if next_due is None:
+            return None
+        return max(next_due - now, 0)
+
+    def start(self):
+        """Запускает фоновую отправку дайджестов и очередь отправки."""
+        self.outbox.start()
+        self._thread = threading.Thread(target=self._work, daemon=True,
+                                        name='digest')
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """.
+        Отправляет накопленные дайджесты и останавливает поток и очередь
+        отправки, дожидаясь её не дольше timeout секунд.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.outbox.stop(timeout)
+
+    def join(self):
+        """Отправляет накопленное и ждёт, пока опустеет очередь отправки."""
+        self.flush()
+        self.outbox.join()
+
+    def stats(self):
+        """Счётчики очереди отправки вместе со счётчиками дайджестов."""
+        stats = self.outbox.stats()
+        with self._lock:
+            for name, value in self.counters.items():
+                stats[f'digest_{name}'] = value
+            stats['digest_pending'] = len(self._digests)
+        return stats
+
+    def _send(self, chat_id, digest):
+        chunks = homework.split_message(digest.texts, self.max_length)
+        delivery = _Delivery(digest.callbacks, len(chunks))
+        with self._lock:
+            self.counters['digests'] += 1
+            self.counters['messages'] += len(chunks)
+        for chunk in chunks:
+            if not self.outbox.submit(chat_id, chunk, delivery.done):
+                delivery.done(False)
+
+    def _work(self):
+        while not self._stopped.is_set():
+            timeout = self.flush(self.clock())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
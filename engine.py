@@ -0,0 +1,384 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+import telegram
+
+import circuit_breaker
+from digest import DIGEST_WINDOW, DigestQueue
+from error_notifier import ErrorNotifier
+import exceptions
+import history
+import homework
+import http_pool
+import logging_setup
+import metrics
+from outbound import OutboundQueue
+import rendering
+import routing
+import response_cache
+import scheduler
+import shutdown
+import state_store
+from subscriptions import load_registry
+import webhook
+
+
+load_dotenv()
+
+
+SUBSCRIPTIONS_PATH = os.getenv('SUBSCRIPTIONS_PATH')
+POLL_WORKERS = int(os.getenv('POLL_WORKERS', 16))
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+
+ENGINE_STARTED = 'Движок запущен, подписок - {}, потоков - {}'
+POLL_ERROR = 'Сбой опроса подписки {}: {}'
+NO_SUBSCRIPTIONS = 'Не найдено ни одной подписки'
+MISSING_TELEGRAM_TOKEN = 'Отсутствует токен - TELEGRAM_TOKEN'
+POOL_STATS = 'Статистика пула соединений: {}'
+OUTBOX_STATS = 'Статистика очереди сообщений: {}'
+SCHEDULER_REPORT = 'Статистика адаптивного опроса: {}'
+SUBSCRIPTIONS_RELOADED = ('Подписки перечитаны: добавлено - {}, удалено - {}, '
+                          'всего - {}')
+RELOAD_FAILED = 'Не удалось перечитать подписки: {}'
+ENGINE_STOPPED = 'Движок остановлен, очередь сообщений и состояние сохранены'
+
+
+class PollingEngine:
+    """.
+    Опрашивает API Практикума для всех подписок одного процесса.
+    Каждая подписка занимает не более одного потока одновременно,
+    поэтому медленный студент не задерживает остальных.
+    """
+
+    def __init__(self, registry, bot, store=None,
+                 interval=homework.RETRY_PERIOD, max_workers=POLL_WORKERS,
+                 scheduler=None, breaker=None, outbox=None, cache=None,
+                 renderer=None, router=None, history=None,
+                 clock=time.monotonic):
+        self.registry = registry
+        self.bot = bot
+        self.outbox = outbox
+        self.cache = cache
+        self.renderer = renderer or rendering.get_renderer()
+        self.router = router or routing.Router(bot, outbox)
+        self.history = history
+        self.store = store or state_store.MemoryStateStore()
+        self.scheduler = scheduler
+        self.breaker = breaker or circuit_breaker.for_endpoint(
+            homework.ENDPOINT)
+        self.notifier = ErrorNotifier(homework.MAIN)
+        self.interval = interval
+        self.max_workers = max_workers
+        self.clock = clock
+        self._queue = []
+        self._scheduled = set()
+        self._in_flight = set()
+        self._known = set()
+        self._awaiting = set()
+        self._unsent = set()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def schedule(self, key, delay=0):
+        """Ставит подписку в очередь опроса через delay секунд."""
+        with self._lock:
+            if key in self._scheduled or key in self._in_flight:
+                return
+            self._scheduled.add(key)
+            heapq.heappush(self._queue,
+                           (self.clock() + delay, next(self._counter), key))
+        self._wakeup.set()
+
+    def sync(self):
+        """.
+        Ставит в очередь подписки, добавленные в реестр, восстанавливая
+        их курсоры из хранилища.
+        """
+        for key in self.registry.keys():
+            if key not in self._known:
+                self._known.add(key)
+                subscription = self.registry.get(key)
+                subscription.timestamp = self.store.get_cursor(
+                    key, subscription.timestamp)
+            self.schedule(key)
+
+    def poll(self, subscription):
+        """.
+        Выполняет один цикл опроса для подписки, возвращает True, если
+        уведомление о смене статуса отправлено или поставлено в очередь.
+        Пока предыдущее уведомление подписки не доставлено, опрос
+        пропускается. Не изменившийся ответ сравнивается со статусами,
+        только если прошлое уведомление так и не было доставлено.
+        """
+        if subscription.key in self._awaiting:
+            return False
+        try:
+            response, fresh = self.fetch(subscription)
+            self.notifier.resolve(subscription.chat_id)
+            if not fresh and subscription.key not in self._unsent:
+                return False
+            names = {}
+            changes, message = homework.prepare_update(
+                response, self.store.get_statuses(subscription.key),
+                self.renderer.for_locale(subscription.locale), names)
+            if message is None:
+                return False
+            cursor = response.get('current_date', subscription.timestamp)
+            self._unsent.add(subscription.key)
+            self._awaiting.add(subscription.key)
+            self.router.send(subscription, message, changes)
+            if self.deliver(subscription, message,
+                            partial(self._delivered, subscription, cursor,
+                                    changes, names)):
+                return True
+            self._awaiting.discard(subscription.key)
+        except exceptions.CircuitOpenException as error:
+            logging.warning(POLL_ERROR.format(subscription.key, error))
+        except Exception as error:
+            logging.error(POLL_ERROR.format(subscription.key, error))
+            self.notifier.notify(subscription.chat_id, error,
+                                 partial(self.deliver, subscription))
+        return False
+
+    def fetch(self, subscription):
+        """.
+        Запрашивает статусы подписки через предохранитель и кэш ответов.
+        Возвращает ответ и признак того, что он изменился.
+        """
+        if self.cache is None:
+            return self.breaker.call(homework.request_statuses,
+                                     subscription.headers,
+                                     subscription.timestamp), True
+        return self.breaker.call(response_cache.fetch, self.cache,
+                                 subscription.headers,
+                                 subscription.timestamp)
+
+    def deliver(self, subscription, message, callback=None):
+        """.
+        Отправляет сообщение в чат подписки: через очередь, если она
+        задана, иначе сразу. callback(sent) вызывается по итогу отправки.
+        """
+        if self.outbox is not None:
+            return self.outbox.submit(subscription.chat_id, message,
+                                      callback)
+        sent = homework.send_to_chat(self.bot, subscription.chat_id, message)
+        if callback is not None:
+            callback(sent)
+        return sent
+
+    def _delivered(self, subscription, cursor, changes, names, sent):
+        self._awaiting.discard(subscription.key)
+        if sent:
+            self.commit(subscription, cursor, changes, names)
+
+    def commit(self, subscription, cursor, changes, names=None):
+        """.
+        Сдвигает курсор подписки, запоминает отправленные статусы с
+        названиями работ и дописывает их в журнал статусов с текущим
+        временем. Статусы, запомненные при первом опросе, в журнал не
+        пишутся: когда они сменились, неизвестно.
+        """
+        seeded = not self.store.get_statuses(subscription.key)
+        subscription.timestamp = cursor
+        self._unsent.discard(subscription.key)
+        self.router.delivered(subscription)
+        self.store.record(subscription.key, cursor, changes, names)
+        if self.history is not None and not seeded:
+            self.history.append(subscription.key, changes, names=names)
+
+    def next_delay(self, subscription, changed):
+        """.
+        Возвращает задержку до следующего опроса подписки, но не раньше
+        пробного запроса разомкнутого предохранителя.
+        """
+        if self.scheduler is None:
+            delay = self.interval
+        else:
+            delay = self.scheduler.next_interval(
+                subscription.key,
+                self.store.get_statuses(subscription.key).values(),
+                changed)
+        return max(delay, self.breaker.retry_after())
+
+    def run_pending(self):
+        """.
+        Отправляет в пул все подошедшие по времени подписки и возвращает
+        число секунд до следующего опроса.
+        """
+        with self._lock:
+            while self._queue and len(self._in_flight) < self.max_workers:
+                due, _, key = self._queue[0]
+                delay = due - self.clock()
+                if delay > 0:
+                    return delay
+                heapq.heappop(self._queue)
+                metrics.SLEEP_DRIFT.observe(-delay)
+                self._scheduled.discard(key)
+                subscription = self.registry.get(key)
+                if subscription is None:
+                    continue
+                self._in_flight.add(key)
+                self._executor.submit(self._run_task, subscription)
+            if not self._queue:
+                return self.interval
+            return None
+
+    def _run_task(self, subscription):
+        changed = False
+        started = time.monotonic()
+        try:
+            with logging_setup.log_context(
+                    tenant=subscription.key,
+                    request_id=logging_setup.new_request_id()):
+                changed = self.poll(subscription)
+        finally:
+            metrics.LOOP_SECONDS.observe(time.monotonic() - started)
+            with self._lock:
+                self._in_flight.discard(subscription.key)
+            if subscription.key in self.registry:
+                self.schedule(subscription.key,
+                              self.next_delay(subscription, changed))
+            elif self.scheduler is not None:
+                self.scheduler.forget(subscription.key)
+            self._wakeup.set()
+
+    def run(self):
+        """Крутит цикл опроса до вызова stop()."""
+        self.sync()
+        while not self._stopped.is_set():
+            timeout = self.run_pending()
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            self.store.maybe_flush()
+        self._executor.shutdown(wait=True)
+        self.router.close()
+        self.store.flush()
+
+    def stop(self):
+        """Останавливает цикл опроса."""
+        self._stopped.set()
+        self._wakeup.set()
+
+
+def load_subscriptions():
+    """.
+    Проверяет токен бота и загружает реестр подписок из окружения.
+    """
+    if homework.TELEGRAM_TOKEN is None:
+        logging.critical(MISSING_TELEGRAM_TOKEN)
+        raise ValueError(MISSING_TELEGRAM_TOKEN)
+    registry = load_registry(SUBSCRIPTIONS_PATH, homework.PRACTICUM_TOKEN,
+                             homework.TELEGRAM_CHAT_ID)
+    if not registry:
+        logging.critical(NO_SUBSCRIPTIONS)
+        raise ValueError(NO_SUBSCRIPTIONS)
+    return registry
+
+
+def reload_subscriptions(registry, on_change=None):
+    """.
+    Перечитывает .env и файл подписок и приводит к ним реестр, затем
+    вызывает on_change(). При ошибке оставляет прежние подписки.
+    """
+    load_dotenv(override=True)
+    try:
+        fresh = load_registry(os.getenv('SUBSCRIPTIONS_PATH',
+                                        SUBSCRIPTIONS_PATH),
+                              os.getenv('PRACTICUM_TOKEN'),
+                              os.getenv('TELEGRAM_CHAT_ID'))
+    except (OSError, TypeError, ValueError) as error:
+        logging.error(RELOAD_FAILED.format(error))
+        return False
+    if not fresh:
+        logging.error(RELOAD_FAILED.format(NO_SUBSCRIPTIONS))
+        return False
+    added, removed = registry.merge(fresh)
+    logging.info(SUBSCRIPTIONS_RELOADED.format(added, removed,
+                                               len(registry)))
+    if on_change is not None:
+        on_change()
+    return True
+
+
+def register_engine_stats(engine, pool=None):
+    """Публикует статистику компонентов движка как метрики."""
+    if pool is not None:
+        metrics.register_stats('homework_http_pool', 'Счётчики пула HTTP',
+                               pool.stats)
+    if engine.outbox is not None:
+        metrics.register_stats('homework_outbox',
+                               'Счётчики очереди сообщений',
+                               engine.outbox.stats)
+    if engine.cache is not None:
+        metrics.register_stats('homework_response_cache',
+                               'Статистика кэша ответов API',
+                               engine.cache.stats)
+    if engine.scheduler is not None:
+        metrics.register_stats('homework_scheduler',
+                               'Статистика адаптивного опроса',
+                               engine.scheduler.report)
+    metrics.register_stats('homework_routing',
+                           'Счётчики рассылки дополнительным адресатам',
+                           engine.router.stats)
+    metrics.register_stats(
+        'homework_engine', 'Состояние движка',
+        lambda: {'subscriptions': len(engine.registry),
+                 'coalesced_subscriptions': engine.registry.coalesced,
+                 'breaker_retry_after': engine.breaker.retry_after()})
+
+
+def main():
+    """Запускает опрос всех подписок в одном процессе."""
+    registry = load_subscriptions()
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    pool = http_pool.enable(maxsize=POLL_WORKERS)
+    store = state_store.open_store(homework.STATE_STORE_PATH)
+    statuses = history.open_history()
+    sender = OutboundQueue(bot)
+    outbox = DigestQueue(sender) if DIGEST_WINDOW > 0 else sender
+    outbox.start()
+    engine = PollingEngine(
+        registry, bot, store,
+        scheduler=scheduler.AdaptiveScheduler(homework.RETRY_PERIOD),
+        outbox=outbox, cache=response_cache.ResponseCache(),
+        history=statuses)
+    register_engine_stats(engine, pool)
+    metrics.serve()
+    receiver = webhook.serve(registry, store, bot, sender, statuses)
+    logging.info(ENGINE_STARTED.format(len(registry), engine.max_workers))
+    try:
+        shutdown.run_until_signal(
+            engine.run, engine.stop,
+            partial(reload_subscriptions, registry, engine.sync))
+    finally:
+        if receiver is not None:
+            receiver.stop()
+        outbox.stop(SHUTDOWN_TIMEOUT)
+        logging.info(OUTBOX_STATS.format(outbox.stats()))
+        logging.info(POOL_STATS.format(pool.stats()))
+        logging.info(SCHEDULER_REPORT.format(engine.scheduler.report()))
+        http_pool.disable()
+        store.close()
+        if statuses is not None:
+            statuses.close()
+        logging.info(ENGINE_STOPPED)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(levelname)s - %(name)s - %(funcName)s - '
+               '%(lineno)s - %(message)s',
+        handlers=logging_setup.queue_handlers(__file__ + '.log')
+    )
+    main()
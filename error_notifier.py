@@ -0,0 +1,92 @@
+import logging
+import os
+import re
+import threading
+import time
+
+from rate_limit import TokenBucket
+
+
+ERROR_REPEAT_WINDOW = int(os.getenv('ERROR_REPEAT_WINDOW', 3600))
+ERROR_MESSAGES_PER_MINUTE = float(os.getenv('ERROR_MESSAGES_PER_MINUTE', 20))
+
+STILL_FAILING = ('Сбой в работе программы продолжается: {} '
+                 '(повторов - {} с {})')
+ERROR_SUPPRESSED = 'Сообщение об ошибке для чата {} не отправлено: {}'
+TIME_FORMAT = '%d.%m.%Y %H:%M'
+
+OBJECT_ADDRESS = re.compile(r'0x[0-9a-fA-F]+')
+
+
+class ErrorNotifier:
+    """.
+    Сообщает об ошибках в чат без спама: повтор той же ошибки
+    отправляется не чаще раза в window секунд в виде сводки с числом
+    повторов, а все сообщения об ошибках проходят через общий
+    ограничитель частоты.
+    """
+
+    def __init__(self, template, window=ERROR_REPEAT_WINDOW, bucket=None,
+                 clock=time.time):
+        self.template = template
+        self.window = window
+        self.bucket = bucket or TokenBucket(
+            ERROR_MESSAGES_PER_MINUTE / 60, ERROR_MESSAGES_PER_MINUTE)
+        self.clock = clock
+        self.suppressed = 0
+        self._chats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(error):
+        """.
+        Возвращает признак, по которому ошибки считаются одинаковыми.
+        Адреса объектов вида 0x7f... меняются от попытки к попытке,
+        поэтому из признака убираются.
+        """
+        return OBJECT_ADDRESS.sub('0x', f'{type(error).__name__}: {error}')
+
+    def _next_message(self, chat_id, error):
+        now = self.clock()
+        signature = self.signature(error)
+        with self._lock:
+            state = self._chats.get(chat_id)
+            if state is None or state['signature'] != signature:
+                state = {'signature': signature, 'first_seen': now,
+                         'count': 0, 'last_sent': None}
+                self._chats[chat_id] = state
+            state['count'] += 1
+            if state['last_sent'] is None:
+                message = self.template.format(error)
+            elif now - state['last_sent'] >= self.window:
+                message = STILL_FAILING.format(
+                    error, state['count'],
+                    time.strftime(TIME_FORMAT,
+                                  time.localtime(state['first_seen'])))
+            else:
+                return None, state
+            return message, state
+
+    def notify(self, chat_id, error, send):
+        """.
+        Сообщает об ошибке через send(text). Возвращает False, только
+        если отправка была нужна и не удалась.
+        """
+        message, state = self._next_message(chat_id, error)
+        if message is None:
+            self.suppressed += 1
+            return True
+        if not self.bucket.try_acquire():
+            self.suppressed += 1
+            logging.warning(ERROR_SUPPRESSED.format(chat_id, message))
+            return True
+        if not send(message):
+            return False
+        with self._lock:
+            state['last_sent'] = self.clock()
+        return True
+
+    def resolve(self, chat_id):
+        """Забывает ошибку чата после успешного цикла."""
+        with self._lock:
+            self._chats.pop(chat_id, None)
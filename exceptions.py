@@ -11,3 +11,29 @@ class IncorrectResponseException(Exception):
 class SendMessageException(Exception):
     """Произошла ошибка во время отправки сообщения в Телеграм."""
     pass
+
+
+class ServerErrorException(CodeStatusException):
+    """API вернул ошибку сервера."""
+    pass
+
+
+class RetryAfterException(ServerErrorException):
+    """API попросил повторить запрос позже."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenException(Exception):
+    """Запросы к API временно приостановлены после серии сбоев."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ShutdownRequested(Exception):
+    """Процесс получил сигнал остановки во время ожидания."""
+    pass
@@ -0,0 +1,103 @@
+import json
+import os
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+HOMEWORK_FIELDS = ('id', 'homework_name', 'status', 'date_updated',
+                   'reviewer_comment')
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+
+if msgspec is not None:
+    from typing import Any, List, TypedDict
+
+    class Homework(TypedDict, total=False):
+        id: Any
+        homework_name: Any
+        status: Any
+        date_updated: Any
+        reviewer_comment: Any
+
+    class StatusesResponse(TypedDict, total=False):
+        homeworks: List[Homework]
+        current_date: Any
+        error: Any
+        code: Any
+
+    _typed_decoder = msgspec.json.Decoder(StatusesResponse)
+    _any_decoder = msgspec.json.Decoder()
+
+    def _msgspec_statuses(body):
+        try:
+            return _typed_decoder.decode(body)
+        except msgspec.ValidationError:
+            return _trim_response(_any_decoder.decode(body))
+
+
+def _choose_backend(name=JSON_BACKEND):
+    if name in ('auto', 'msgspec') and msgspec is not None:
+        return 'msgspec'
+    if name in ('auto', 'orjson') and orjson is not None:
+        return 'orjson'
+    return 'stdlib'
+
+
+BACKEND = _choose_backend()
+
+
+def loads(body):
+    """Разбирает JSON самым быстрым из доступных декодеров."""
+    if BACKEND == 'msgspec':
+        return _any_decoder.decode(body)
+    if BACKEND == 'orjson':
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def trim_homework(homework):
+    """Оставляет в работе только поля записи models.Homework."""
+    if not isinstance(homework, dict):
+        return homework
+    return {field: homework[field] for field in HOMEWORK_FIELDS
+            if field in homework}
+
+
+def _trim_response(response):
+    if not isinstance(response, dict):
+        return response
+    homeworks = response.get('homeworks')
+    if isinstance(homeworks, list):
+        response['homeworks'] = [trim_homework(homework)
+                                 for homework in homeworks]
+    return response
+
+
+def decode_statuses(body):
+    """.
+    Разбирает ответ API статусов, оставляя в работах только поля записи
+    models.Homework. С msgspec лишние поля пропускаются при
+    разборе по схеме, иначе отбрасываются сразу после него.
+    """
+    if BACKEND == 'msgspec':
+        return _msgspec_statuses(body)
+    return _trim_response(loads(body))
+
+
+def response_json(response_from_api):
+    """.
+    Разбирает тело HTTP-ответа быстрым декодером; для объектов без тела
+    в байтах вызывает их собственный json().
+    """
+    body = getattr(response_from_api, 'content', None)
+    if not isinstance(body, bytes) or not body:
+        return response_from_api.json()
+    return decode_statuses(body)
@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+
+HISTORY_PATH = os.getenv('HISTORY_PATH')
+HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 500))
+HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 5))
+HISTORY_LIMIT = 10
+
+
+class Transition(NamedTuple):
+    """Смена статуса работы: когда и на какой статус."""
+
+    key: str
+    homework: str
+    status: str
+    changed_at: float
+    name: str
+
+
+class StatusHistory:
+    """.
+    Журнал смен статусов работ в SQLite, в который только дописывают.
+    Записи копятся в памяти и сохраняются пачкой фоновым потоком: после
+    batch_size записей или раз в flush_interval секунд, поэтому append()
+    не ждёт диска. Запросы сначала сохраняют накопленное.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS transitions ('
+        'id INTEGER PRIMARY KEY, key TEXT NOT NULL, '
+        'homework TEXT NOT NULL, name TEXT NOT NULL, status TEXT NOT NULL, '
+        'changed_at REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS transitions_by_key '
+        'ON transitions (key, changed_at)',
+        'CREATE INDEX IF NOT EXISTS transitions_by_name '
+        'ON transitions (key, name, changed_at)',
+        'CREATE INDEX IF NOT EXISTS transitions_by_time '
+        'ON transitions (changed_at)',
+    )
+
+    def __init__(self, path, batch_size=HISTORY_BATCH_SIZE,
+                 flush_interval=HISTORY_FLUSH_INTERVAL, clock=time.time):
+        self.path = os.fspath(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._connection = sqlite3.connect(self.path,
+                                           check_same_thread=False)
+        with self._connection:
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+
+    def append(self, key, changes, changed_at=None, names=None):
+        """.
+        Добавляет в журнал смены статусов подписки: словарь
+        работа -> новый статус. Названия работ берутся из names, без
+        названия работа записывается под своим ключом.
+        """
+        changed_at = self.clock() if changed_at is None else changed_at
+        names = names or {}
+        with self._lock:
+            self._pending.extend(
+                (key, str(homework), str(names.get(homework, homework)),
+                 str(status), changed_at)
+                for homework, status in changes.items())
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Немедленно сохраняет накопленные записи."""
+        with self._write_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = []
+            if pending:
+                with self._connection:
+                    self._connection.executemany(
+                        'INSERT INTO transitions '
+                        '(key, homework, name, status, changed_at) '
+                        'VALUES (?, ?, ?, ?, ?)', pending)
+            return len(pending)
+
+    def start(self):
+        """Запускает фоновое сохранение."""
+        self._thread = threading.Thread(target=self._work, daemon=True,
+                                        name='history')
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Останавливает фоновый поток, сохраняет записи и закрывает базу."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._connection.close()
+
+    def last_transitions(self, key, limit=HISTORY_LIMIT, name=None):
+        """.
+        Последние limit смен статусов подписки или одной её работы
+        с названием name.
+        """
+        query = ('SELECT key, homework, status, changed_at, name '
+                 'FROM transitions WHERE key = ?')
+        params = [key]
+        if name is not None:
+            query += ' AND name = ?'
+            params.append(str(name))
+        query += ' ORDER BY changed_at DESC, id DESC LIMIT ?'
+        params.append(limit)
+        return [Transition(*row) for row in self._query(query, params)]
+
+    def time_in_status(self, key, name, status='reviewing', now=None):
+        """.
+        Сколько секунд работа с названием name провела в статусе за всю
+        историю. Если статус текущий, время считается до now.
+        """
+        now = self.clock() if now is None else now
+        rows = self._query(
+            'SELECT SUM(COALESCE(next_at, ?) - changed_at) FROM ('
+            'SELECT status, changed_at, LEAD(changed_at) OVER '
+            '(ORDER BY changed_at, id) AS next_at FROM transitions '
+            'WHERE key = ? AND name = ?) WHERE status = ?',
+            (now, key, str(name), str(status)))
+        return rows[0][0] or 0.0
+
+    def _query(self, query, params):
+        self.flush()
+        with self._write_lock:
+            return self._connection.execute(query, params).fetchall()
+
+    def _work(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def open_history(path=HISTORY_PATH, **kwargs):
+    """.
+    Открывает журнал статусов и запускает фоновое сохранение. Без пути
+    журнал не ведётся и возвращается None.
+    """
+    if not path:
+        return None
+    return StatusHistory(path, **kwargs).start()
@@ -1,3 +1,4 @@
+from functools import partial
 from http import HTTPStatus
 import logging
 import os
@@ -6,8 +7,19 @@ import time
 from dotenv import load_dotenv
 import requests
 import telegram
+from telegram.constants import MAX_MESSAGE_LENGTH
 
+import circuit_breaker
+from error_notifier import ErrorNotifier
 import exceptions
+import fast_json
+import http_pool
+import logging_setup
+import metrics
+from models import Homework
+from shutdown import GracefulShutdown
+import state_store
+from subscriptions import token_key
 
 
 load_dotenv()
@@ -18,8 +30,12 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
+REQUEST_TIMEOUT = 30
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+STATE_STORE_PATH = os.getenv('STATE_STORE_PATH')
+RETRY_LATER_CODES = (HTTPStatus.TOO_MANY_REQUESTS,
+                     HTTPStatus.SERVICE_UNAVAILABLE)
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -35,15 +51,18 @@ CHECK_RESPONSE_DICT = ('Возвращен неверный тип данных.
                        'а получен - {}')
 CHECK_RESPONSE_LIST = ('Возвращен неверный тип данных. Ожидается - list,'
                        'а получен - {}')
-PARSE_STATUS_ERROR = 'Получен неизвестный статус - {}.'
 MAIN = 'Сбой в работе программы: {}'
-MESSAGE_SENT = 'Бот отправил сообщение {}'
+API_PAUSED = 'Запрос к API пропущен: {}'
+UPDATE_SEPARATOR = '\n'
+MESSAGE_SENT = 'Бот отправил сообщение %s'
 MESSAGE_SENT_ERROR = 'Ошибка отправки сообщения - {}({})'
+API_RESPONSE = 'API ответил с кодом %s за %.3f с'
+MASKED = '***'
 BOT_STARTED = 'Бот запущен'
+BOT_STOPPED = 'Бот остановлен, состояние сохранено'
 MISSING_TOKENS = 'Отсутствует(ют) токен(ы) - {}'
-MISSING_HOMEWORK_NAME = 'Отсутствует имя домашней работы.'
-MISSING_STATUS = 'Отсутствует статус работы.'
 MISSING_HOMEWORK_KEY = 'Возвращен ответ без ключа homeworks'
+HOMEWORK_SKIPPED = 'Некорректная работа пропущена: {}'
 
 
 def check_tokens():
@@ -56,47 +75,142 @@ def check_tokens():
         raise ValueError(MISSING_TOKENS.format(missed_tokens))
 
 
-def send_message(bot, message):
+def split_message(parts, limit=MAX_MESSAGE_LENGTH,
+                  separator=UPDATE_SEPARATOR):
     """.
-    Отправляет сообщение в Telegram чат.
+    Склеивает части через separator в сообщения не длиннее limit.
+    Части не разрываются, кроме тех, что сами длиннее limit.
+    """
+    chunks = []
+    current = ''
+    for part in parts:
+        if len(part) > limit:
+            if current:
+                chunks.append(current)
+                current = ''
+            while len(part) > limit:
+                chunks.append(part[:limit])
+                part = part[limit:]
+        candidate = current + separator + part if current else part
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = part
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def send_to_chat(bot, chat_id, message):
+    """.
+    Отправляет сообщение в указанный Telegram чат, разбивая слишком
+    длинное по строкам на несколько сообщений.
     """
+    if len(message) > MAX_MESSAGE_LENGTH:
+        return all([send_to_chat(bot, chat_id, chunk) for chunk in
+                    split_message(message.split(UPDATE_SEPARATOR))])
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logging.debug(MESSAGE_SENT.format(message))
+        bot.send_message(chat_id, message)
+        logging.debug(MESSAGE_SENT, message)
+        metrics.MESSAGES.inc('sent')
         return True
     except Exception as error:
         logging.exception(MESSAGE_SENT_ERROR.format(error, message))
+        metrics.MESSAGES.inc('failed')
         return False
 
 
-def get_api_answer(timestamp):
+def send_message(bot, message):
     """.
-    Делает запрос к единственному эндпоинту API-сервиса.
+    Отправляет сообщение в Telegram чат.
     """
-    payload = {'from_date': timestamp}
+    return send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def mask_headers(headers):
+    """.
+    Возвращает копию заголовков со скрытым токеном для логов и ошибок.
+    """
+    return {name: MASKED if name == 'Authorization' else value
+            for name, value in headers.items()}
+
+
+def send_api_request(headers, payload):
+    """.
+    Отправляет запрос к API и возвращает ответ без проверки.
+    """
+    pool = http_pool.active()
+    http_get = requests.get if pool is None else pool.get
+    started = time.monotonic()
     try:
-        response_from_api = requests.get(ENDPOINT,
-                                         headers=HEADERS,
-                                         params=payload)
+        response_from_api = http_get(ENDPOINT,
+                                     headers=headers,
+                                     params=payload,
+                                     timeout=REQUEST_TIMEOUT)
     except requests.RequestException as error:
+        metrics.API_REQUESTS.inc('error')
         raise ConnectionError(
-            GET_API_ANSWER.format(error, ENDPOINT, HEADERS, payload)
+            GET_API_ANSWER.format(error, ENDPOINT, mask_headers(headers),
+                                  payload)
         )
+    return observe_api_response(response_from_api, started)
 
-    if response_from_api.status_code != HTTPStatus.OK:
-        raise exceptions.CodeStatusException(
-            GET_API_ANSWER.format(response_from_api.status_code, ENDPOINT,
-                                  HEADERS, payload)
-        )
-    response = response_from_api.json()
+
+def observe_api_response(response_from_api, started):
+    """.
+    Записывает код и время ответа API в метрики и лог.
+    """
+    latency = time.monotonic() - started
+    status_code = int(response_from_api.status_code)
+    metrics.API_LATENCY.observe(latency)
+    metrics.API_REQUESTS.inc(str(status_code))
+    logging.debug(API_RESPONSE, status_code, latency,
+                  extra={'status_code': status_code, 'latency': latency})
+    return response_from_api
+
+
+def request_statuses(headers, timestamp):
+    """.
+    Запрашивает статусы домашних работ с переданными заголовками.
+    """
+    payload = {'from_date': timestamp}
+    return check_api_reply(send_api_request(headers, payload),
+                           headers, payload)
+
+
+def check_api_reply(response_from_api, headers, payload):
+    """.
+    Проверяет код и тело ответа API, возвращает разобранный JSON.
+    """
+    status_code = response_from_api.status_code
+    if status_code != HTTPStatus.OK:
+        message = GET_API_ANSWER.format(status_code, ENDPOINT,
+                                        mask_headers(headers), payload)
+        if status_code in RETRY_LATER_CODES:
+            raise exceptions.RetryAfterException(
+                message, circuit_breaker.parse_retry_after(
+                    response_from_api.headers.get('Retry-After')))
+        if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            raise exceptions.ServerErrorException(message)
+        raise exceptions.CodeStatusException(message)
+    response = fast_json.response_json(response_from_api)
     for error_word in ['error', 'code']:
         if error_word in response:
             raise exceptions.IncorrectResponseException(
                 GET_API_ANSWER.format(error_word, ENDPOINT,
-                                      HEADERS, payload))
+                                      mask_headers(headers), payload))
     return response
 
 
+def get_api_answer(timestamp):
+    """.
+    Делает запрос к единственному эндпоинту API-сервиса.
+    """
+    return request_statuses(HEADERS, timestamp)
+
+
+@metrics.count_failures
 def check_response(response):
     """.
     Проверяет ответ API на соответствие документации.
@@ -114,45 +228,137 @@ def check_response(response):
     return homeworks
 
 
+@metrics.count_failures
 def parse_status(homework):
     """.
-    Извлекает из информации о конкретной домашней работе статус этой работы
+    Извлекает из информации о конкретной домашней работе статус этой работы.
+    Вердикт статуса, объявленного в каталоге сообщений, берётся из каталога.
+    """
+    homework = Homework.from_api(homework)
+    verdict = HOMEWORK_VERDICTS.get(homework.status)
+    if verdict is None:
+        import rendering
+        verdict = rendering.get_renderer().verdict(homework.status)
+    return PARSE_STATUS.format(homework.name, verdict)
+
+
+def parse_homeworks(response):
+    """.
+    Проверяет ответ API и возвращает работы в виде записей Homework.
+    Некорректные работы пишутся в лог и пропускаются, чтобы не мешать
+    уведомлениям об остальных.
     """
-    if 'homework_name' not in homework:
-        raise KeyError(MISSING_HOMEWORK_NAME)
-    if 'status' not in homework:
-        raise KeyError(MISSING_STATUS)
-    status = homework.get('status')
-    if status not in HOMEWORK_VERDICTS.keys():
-        raise ValueError(PARSE_STATUS_ERROR.format(status))
-    return PARSE_STATUS.format(homework.get('homework_name'),
-                               HOMEWORK_VERDICTS[status])
+    homeworks = []
+    for homework in check_response(response) or []:
+        try:
+            homeworks.append(Homework.from_api(homework))
+        except (KeyError, TypeError, ValueError) as error:
+            metrics.FAILURES.inc('parse_homeworks')
+            logging.warning(HOMEWORK_SKIPPED.format(error))
+    return homeworks
+
+
+def prepare_update(response, sent_statuses, render=None, names=None):
+    """.
+    Проверяет ответ API, сравнивает все работы с последними отправленными
+    статусами и возвращает изменения вместе с общим текстом уведомления.
+    render(homework) собирает текст по работе, по умолчанию parse_status.
+    Если отправленных статусов ещё нет, запоминает статусы всех работ,
+    а уведомляет только о последней. Переданный словарь names
+    дополняется названиями изменившихся работ.
+    """
+    render = render or parse_status
+    names = {} if names is None else names
+    if not sent_statuses:
+        homeworks = parse_homeworks(response)
+        if not homeworks:
+            return {}, None
+        names.update((homework.key, homework.name) for homework in homeworks)
+        return ({homework.key: homework.status
+                 for homework in reversed(homeworks)},
+                render(homeworks[0]))
+    changes = {}
+    messages = []
+    for homework in reversed(parse_homeworks(response)):
+        key = homework.key
+        if changes.get(key, sent_statuses.get(key)) == homework.status:
+            continue
+        messages.append(render(homework))
+        changes[key] = homework.status
+        names[key] = homework.name
+    if not messages:
+        return {}, None
+    return changes, UPDATE_SEPARATOR.join(messages)
+
+
+def reload_settings():
+    """.
+    Перечитывает токены и чат из окружения и файла .env.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, HEADERS
+    load_dotenv(override=True)
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN', PRACTICUM_TOKEN)
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN', TELEGRAM_TOKEN)
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID)
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    check_tokens()
 
 
 def main():
     """Основная логика работы бота."""
     check_tokens()
 
-    timestamp = 0
+    store = state_store.open_store(STATE_STORE_PATH)
+    key = token_key(PRACTICUM_TOKEN)
+    timestamp = store.get_cursor(key)
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
 
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-            if not homeworks:
-                continue
-            message = parse_status(homeworks[0])
-            if send_message(bot, message):
-                timestamp = response.get('current_date',
-                                         timestamp)
-        except Exception as error:
-            message = MAIN.format(error)
-            logging.error(message)
-            if not send_message(bot, message):
-                raise exceptions.SendMessageException(message)
-        finally:
-            time.sleep(RETRY_PERIOD)
+    breaker = circuit_breaker.for_endpoint(ENDPOINT)
+    notifier = ErrorNotifier(MAIN)
+    shutdown = GracefulShutdown().install()
+
+    metrics.serve()
+
+    try:
+        while True:
+            started = time.monotonic()
+            if shutdown.take_reload():
+                reload_settings()
+                bot = telegram.Bot(token=TELEGRAM_TOKEN)
+                key = token_key(PRACTICUM_TOKEN)
+                timestamp = store.get_cursor(key, timestamp)
+            logging_setup.bind(tenant=key,
+                               request_id=logging_setup.new_request_id())
+            try:
+                response = breaker.call(get_api_answer, timestamp)
+                notifier.resolve(TELEGRAM_CHAT_ID)
+                names = {}
+                changes, message = prepare_update(
+                    response, store.get_statuses(key), names=names)
+                if message is not None and send_message(bot, message):
+                    timestamp = response.get('current_date', timestamp)
+                    store.record(key, timestamp, changes, names)
+            except exceptions.CircuitOpenException as error:
+                logging.warning(API_PAUSED.format(error))
+            except Exception as error:
+                message = MAIN.format(error)
+                logging.error(message)
+                if not notifier.notify(TELEGRAM_CHAT_ID, error,
+                                       partial(send_message, bot)):
+                    raise exceptions.SendMessageException(message)
+            finally:
+                store.maybe_flush()
+                sleep_started = time.monotonic()
+                metrics.LOOP_SECONDS.observe(sleep_started - started)
+                with shutdown.interruptible():
+                    time.sleep(RETRY_PERIOD)
+                metrics.SLEEP_DRIFT.observe(
+                    time.monotonic() - sleep_started - RETRY_PERIOD)
+    except exceptions.ShutdownRequested:
+        logging.info(BOT_STOPPED)
+    finally:
+        shutdown.uninstall()
+        store.close()
 
 
 if __name__ == '__main__':
@@ -161,9 +367,7 @@ if __name__ == '__main__':
         level=logging.DEBUG,
         format='%(asctime)s - %(levelname)s - %(name)s - %(funcName)s - '
                '%(lineno)s - %(message)s',
-        handlers=(logging.StreamHandler(),
-                  logging.FileHandler(filename=__file__ + '.log',
-                                      mode='a', encoding=None, delay=False))
+        handlers=logging_setup.queue_handlers(__file__ + '.log')
     )
 
     logging.info(BOT_STARTED)
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 32))
+POOL_IDLE_TIMEOUT = int(os.getenv('HTTP_POOL_IDLE_TIMEOUT', 300))
+
+
+class PooledSession:
+    """.
+    Сессия requests с пулом keep-alive соединений. Пул на каждый хост
+    ограничен maxsize соединениями, простаивающая дольше idle_timeout
+    сессия закрывается целиком.
+    """
+
+    def __init__(self, connections=POOL_CONNECTIONS, maxsize=POOL_MAXSIZE,
+                 idle_timeout=POOL_IDLE_TIMEOUT, clock=time.monotonic):
+        self.connections = connections
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.evictions = 0
+        self._session = None
+        self._adapter = None
+        self._last_used = None
+        self._retired = {'requests': 0, 'connections': 0}
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._adapter = HTTPAdapter(pool_connections=self.connections,
+                                    pool_maxsize=self.maxsize,
+                                    pool_block=True)
+        self._session = requests.Session()
+        self._session.mount('https://', self._adapter)
+        self._session.mount('http://', self._adapter)
+
+    def _session_for_request(self):
+        with self._lock:
+            now = self.clock()
+            if (self._session is not None
+                    and now - self._last_used > self.idle_timeout):
+                self._close()
+                self.evictions += 1
+            if self._session is None:
+                self._open()
+            self._last_used = now
+            return self._session
+
+    def get(self, url, **kwargs):
+        """Выполняет GET-запрос через пул соединений."""
+        return self._session_for_request().get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """Выполняет POST-запрос через пул соединений."""
+        return self._session_for_request().post(url, **kwargs)
+
+    def _pool_counters(self):
+        counters = {'requests': 0, 'connections': 0}
+        if self._adapter is None:
+            return counters
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            counters['requests'] += pool.num_requests
+            counters['connections'] += pool.num_connections
+        return counters
+
+    def stats(self):
+        """.
+        Возвращает счётчики пула: hits - запросы по уже открытому
+        соединению, misses - открытия новых соединений.
+        """
+        with self._lock:
+            counters = self._pool_counters()
+            total_requests = counters['requests'] + self._retired['requests']
+            misses = (counters['connections']
+                      + self._retired['connections'])
+        return {
+            'requests': total_requests,
+            'hits': max(total_requests - misses, 0),
+            'misses': misses,
+            'evictions': self.evictions,
+        }
+
+    def _close(self):
+        if self._session is None:
+            return
+        counters = self._pool_counters()
+        for name in self._retired:
+            self._retired[name] += counters[name]
+        self._session.close()
+        self._session = None
+        self._adapter = None
+
+    def close(self):
+        """Закрывает все соединения пула."""
+        with self._lock:
+            self._close()
+
+
+_active_pool = None
+
+
+def enable(**kwargs):
+    """Включает общий пул соединений для запросов к API."""
+    global _active_pool
+    if _active_pool is None:
+        _active_pool = PooledSession(**kwargs)
+    return _active_pool
+
+
+def disable():
+    """Закрывает и отключает общий пул соединений."""
+    global _active_pool
+    if _active_pool is not None:
+        _active_pool.close()
+    _active_pool = None
+
+
+def active():
+    """Возвращает включённый пул или None."""
+    return _active_pool
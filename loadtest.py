@@ -0,0 +1,305 @@
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import random
+import resource
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import telegram
+from telegram.utils.request import Request
+
+import circuit_breaker
+import engine
+import homework
+import http_pool
+from outbound import OutboundQueue
+import response_cache
+import state_store
+from subscriptions import SubscriptionRegistry
+
+
+FAKE_TELEGRAM_TOKEN = '123456:' + 'A' * 35
+STATUSES = ('reviewing', 'rejected', 'approved')
+
+REPORT_LINE = '{:<20} {}'
+
+
+class FakePracticum:
+    """.
+    Заменитель API статусов домашних работ. Задержка, доля ошибок 500,
+    доля ответов 429 и длина истории работ задаются параметрами. Статус
+    последней работы токена меняется каждые change_every запросов.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_rate=0.0,
+                 history=1, change_every=5, retry_after=1, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.history = history
+        self.change_every = change_every
+        self.retry_after = retry_after
+        self.rand = random.Random(seed)
+        self.counters = dict.fromkeys(('requests', 'ok', 'errors',
+                                       'throttled'), 0)
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    def reply(self, token, from_date):
+        """Возвращает код ответа, заголовки и тело для запроса токена."""
+        with self._lock:
+            self.counters['requests'] += 1
+            number = self._requests.get(token, 0)
+            self._requests[token] = number + 1
+            roll = self.rand.random()
+        if self.latency:
+            time.sleep(self.latency)
+        if roll < self.throttle_rate:
+            self._count('throttled')
+            return 429, {'Retry-After': str(self.retry_after)}, {
+                'code': 'throttled'}
+        if roll < self.throttle_rate + self.error_rate:
+            self._count('errors')
+            return 500, {}, {'code': 'server_error'}
+        self._count('ok')
+        status = STATUSES[number // self.change_every % len(STATUSES)]
+        homeworks = [
+            {'id': index, 'homework_name': f'{token}_hw_{index}',
+             'status': status if index == self.history else 'approved'}
+            for index in range(self.history, 0, -1)
+        ]
+        return 200, {}, {'homeworks': homeworks,
+                         'current_date': max(from_date, number)}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+class FakeTelegram:
+    """Заменитель Bot API: принимает sendMessage и считает сообщения."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def reply(self, method, data):
+        """Возвращает тело ответа на вызов метода Bot API."""
+        if self.latency:
+            time.sleep(self.latency)
+        if method != 'sendMessage':
+            return {'ok': True, 'result': True}
+        with self._lock:
+            self.sent += 1
+            message_id = self.sent
+        return {'ok': True, 'result': {
+            'message_id': message_id, 'date': int(time.time()),
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text', '')}}
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Маршрутизирует запросы к заменителям Практикума и Telegram."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    practicum = None
+    telegram = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.endswith('/homework_statuses/'):
+            self._send(404, {}, {'code': 'not_found'})
+            return
+        token = self.headers.get('Authorization', '').split(' ', 1)[-1]
+        from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+        self._send(*self.practicum.reply(token, from_date))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            data = {}
+        method = self.path.rstrip('/').rsplit('/', 1)[-1]
+        self._send(200, {}, self.telegram.reply(method, data))
+
+    def _send(self, code, headers, data):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeServer:
+    """HTTP-сервер с заменителями Практикума и Telegram в фоновом потоке."""
+
+    def __init__(self, practicum=None, telegram=None, host='127.0.0.1',
+                 port=0):
+        self.practicum = practicum or FakePracticum()
+        self.telegram = telegram or FakeTelegram()
+        handler = type('Handler', (FakeHandler,), {
+            'practicum': self.practicum, 'telegram': self.telegram})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        """Адрес сервера."""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def endpoint(self):
+        """Адрес заменителя API статусов."""
+        return self.url + '/api/user_api/homework_statuses/'
+
+    def start(self):
+        """Запускает сервер."""
+        threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                         name='fake-server').start()
+        return self
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TimedEngine(engine.PollingEngine):
+    """Движок опроса, который запоминает время каждого запроса к API."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self._latency_lock = threading.Lock()
+
+    def fetch(self, subscription):
+        started = time.perf_counter()
+        try:
+            return super().fetch(subscription)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._latency_lock:
+                self.latencies.append(elapsed)
+
+
+def percentile(values, share):
+    """Возвращает перцентиль share (от 0 до 1) списка значений."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def max_rss_mb():
+    """Пиковое потребление памяти процессом в мегабайтах."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(tokens=1000, duration=10.0, interval=1.0, workers=64,
+        practicum=None, telegram_latency=0.0, cache=True):
+    """.
+    Запускает движок опроса против локальных заменителей на duration
+    секунд для tokens подписок и возвращает отчёт.
+    """
+    server = FakeServer(practicum, FakeTelegram(telegram_latency)).start()
+    original_endpoint = homework.ENDPOINT
+    homework.ENDPOINT = server.endpoint
+    bot = telegram.Bot(FAKE_TELEGRAM_TOKEN, base_url=server.url + '/bot',
+                       request=Request(con_pool_size=workers + 4))
+    registry = SubscriptionRegistry()
+    for number in range(tokens):
+        registry.add(f'token-{number}', number + 1)
+    pool = http_pool.enable(maxsize=workers)
+    outbox = OutboundQueue(bot, global_rate=1e9, chat_rate=1e9,
+                           chat_burst=1000)
+    outbox.start()
+    polling = TimedEngine(
+        registry, bot, state_store.MemoryStateStore(), interval=interval,
+        max_workers=workers, breaker=circuit_breaker.CircuitBreaker(
+            failure_threshold=10 ** 9),
+        outbox=outbox,
+        cache=response_cache.ResponseCache() if cache else None)
+    rss_before = max_rss_mb()
+    thread = threading.Thread(target=polling.run, name='loadtest-engine')
+    started = time.perf_counter()
+    thread.start()
+    try:
+        time.sleep(duration)
+    finally:
+        polling.stop()
+        thread.join()
+        elapsed = time.perf_counter() - started
+        outbox.stop()
+        pool_stats = pool.stats()
+        http_pool.disable()
+        homework.ENDPOINT = original_endpoint
+        server.stop()
+    latencies = polling.latencies
+    return {
+        'tokens': tokens,
+        'seconds': round(elapsed, 2),
+        'api_requests': server.practicum.counters['requests'],
+        'requests_per_second': round(
+            server.practicum.counters['requests'] / elapsed, 1),
+        'latency_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'api_errors': server.practicum.counters['errors'],
+        'api_throttled': server.practicum.counters['throttled'],
+        'messages_sent': server.telegram.sent,
+        'pool_hits': pool_stats.get('hits'),
+        'max_rss_mb': round(max_rss_mb(), 1),
+        'rss_growth_mb': round(max_rss_mb() - rss_before, 1),
+    }
+
+
+def parse_args(args=None):
+    """Разбирает параметры командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный тест движка опроса на локальных '
+                    'заменителях API Практикума и Telegram.')
+    parser.add_argument('--tokens', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--interval', type=float, default=1)
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--history', type=int, default=1)
+    parser.add_argument('--change-every', type=int, default=5)
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--no-cache', action='store_true')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Запускает нагрузочный тест и печатает отчёт."""
+    options = parse_args(args)
+    practicum = FakePracticum(
+        latency=options.latency, error_rate=options.error_rate,
+        throttle_rate=options.throttle_rate, history=options.history,
+        change_every=options.change_every)
+    report = run(options.tokens, options.duration, options.interval,
+                 options.workers, practicum, options.telegram_latency,
+                 not options.no_cache)
+    for name, value in report.items():
+        print(REPORT_LINE.format(name, value))
+    return report
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.CRITICAL)
+    main()
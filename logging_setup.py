@@ -0,0 +1,280 @@
+import atexit
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import gzip
+import itertools
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import os
+import queue
+import re
+import shutil
+import time
+
+
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_ROTATE_INTERVAL = int(os.getenv('LOG_ROTATE_INTERVAL', 24 * 60 * 60))
+LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', 100))
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', 1))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
+CONTEXT_FIELDS = ('tenant', 'request_id')
+EXTRA_FIELDS = ('latency', 'status_code')
+SECRET_PATTERNS = (
+    re.compile(r'(OAuth\s+)[^\s\'",}]+'),
+    re.compile(r'(?<!\d)\d{6,}:[\w-]{30,}'),
+)
+REDACTED = '***'
+
+_context = contextvars.ContextVar('log_context', default={})
+_request_ids = itertools.count(1)
+
+
+def new_request_id():
+    """Возвращает новый идентификатор запроса в пределах процесса."""
+    return '{:x}-{:x}'.format(os.getpid(), next(_request_ids))
+
+
+def bind(**fields):
+    """.
+    Добавляет поля в контекст логов текущего потока или задачи asyncio
+    и возвращает токен для сброса.
+    """
+    return _context.set({**_context.get(), **fields})
+
+
+@contextmanager
+def log_context(**fields):
+    """Контекст логов на время блока with."""
+    token = bind(**fields)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def redact(text):
+    """Скрывает токены в строке."""
+    for pattern in SECRET_PATTERNS:
+        text = pattern.sub(
+            lambda match: (match.group(1) if match.groups() else '')
+            + REDACTED, text)
+    return text
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет в запись поля контекста: tenant и request_id."""
+
+    def filter(self, record):
+        context = _context.get()
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field))
+        return True
+
+
+class RedactingFilter(logging.Filter):
+    """Скрывает токены в тексте записи и трассировке исключения."""
+
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну строку JSON."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS + EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc_info'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def gzip_namer(name):
+    """Имя сжатого архива лога."""
+    return name + '.gz'
+
+
+def gzip_rotator(source, destination):
+    """Сжимает ротированный лог и удаляет исходный файл."""
+    with open(source, 'rb') as source_file:
+        with gzip.open(destination, 'wb') as destination_file:
+            shutil.copyfileobj(source_file, destination_file)
+    os.remove(source)
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """.
+    Файловый обработчик с ротацией по размеру и по времени, сжатием
+    архивов и пакетной записью: буфер сбрасывается на диск раз в
+    batch_size записей, а также по flush_now(). Размер файла считается
+    без обращения к потоку, чтобы проверка ротации не сбрасывала буфер.
+    """
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES,
+                 backup_count=LOG_BACKUP_COUNT, interval=LOG_ROTATE_INTERVAL,
+                 batch_size=LOG_BATCH_SIZE, encoding='utf-8',
+                 clock=time.time):
+        super().__init__(filename, maxBytes=max_bytes,
+                         backupCount=backup_count, encoding=encoding)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self.namer = gzip_namer
+        self.rotator = gzip_rotator
+        self.rollover_at = clock() + interval
+        self._pending = 0
+        self._size = 0
+        self._record_size = 0
+        if os.path.exists(self.baseFilename):
+            self._size = os.path.getsize(self.baseFilename)
+
+    def shouldRollover(self, record):
+        self._record_size = len(self.format(record)) + len(self.terminator)
+        if self.interval and self.clock() >= self.rollover_at:
+            return True
+        if self._size and 0 < self.maxBytes <= self._size + self._record_size:
+            return True
+        self._size += self._record_size
+        return False
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self.clock() + self.interval
+        self._size = self._record_size
+
+    def flush(self):
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush_now()
+
+    def flush_now(self):
+        """Немедленно сбрасывает буфер на диск."""
+        self._pending = 0
+        super().flush()
+
+    def close(self):
+        self.flush_now()
+        super().close()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """.
+    Кладёт записи в ограниченную очередь и отбрасывает их при
+    переполнении, не задерживая вызывающий поток.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener = None
+        self.addFilter(ContextFilter())
+
+    def setFormatter(self, formatter):
+        """Передаёт форматтер обработчикам слушателя."""
+        if self.listener is None:
+            super().setFormatter(formatter)
+            return
+        for handler in self.listener.handlers:
+            if not isinstance(handler.formatter, JsonFormatter):
+                handler.setFormatter(formatter)
+
+    def prepare(self, record):
+        """.
+        Подставляет аргументы сообщения и текст исключения, а форматирование
+        оставляет фоновому потоку.
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener(QueueListener):
+    """.
+    Слушатель очереди логов, который сбрасывает буферы обработчиков,
+    если новых записей нет дольше flush_interval секунд.
+    """
+
+    def __init__(self, log_queue, *handlers,
+                 flush_interval=LOG_FLUSH_INTERVAL):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, self.flush_interval)
+            except queue.Empty:
+                self.flush()
+                if not block:
+                    raise
+
+    def flush(self):
+        """Сбрасывает буферы всех обработчиков."""
+        for handler in self.handlers:
+            getattr(handler, 'flush_now', handler.flush)()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        super().stop()
+        self.flush()
+
+
+def queue_handlers(filename, stream=True, log_format=LOG_FORMAT,
+                   **file_options):
+    """.
+    Запускает фоновую запись логов в файл (и в поток stderr) и возвращает
+    обработчики для logging.basicConfig: запись лога в коде только
+    кладёт её в очередь. При log_format='json' каждая запись пишется
+    строкой JSON. Токены в записях скрываются.
+    """
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    handlers = [BatchingRotatingFileHandler(filename, **file_options)]
+    if stream:
+        handlers.append(logging.StreamHandler())
+    for file_handler in handlers:
+        file_handler.addFilter(RedactingFilter())
+        if log_format == 'json':
+            file_handler.setFormatter(JsonFormatter())
+    handler = DroppingQueueHandler(log_queue)
+    handler.listener = BatchingQueueListener(log_queue, *handlers)
+    handler.listener.start()
+    atexit.register(handler.listener.stop)
+    return (handler,)
@@ -0,0 +1,231 @@
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import os
+import threading
+
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRICS_STARTED = 'Метрики доступны на http://{}:{}/metrics'
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(name, str(value).replace('"', '\\"'))
+        for name, value in pairs)
+    return '{' + body + '}'
+
+
+class Metric:
+    """Базовая метрика с именем, описанием и метками."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def expose(self):
+        """Возвращает метрику в текстовом формате Prometheus."""
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._sample_lines(labels, value))
+        return lines
+
+    def _sample_lines(self, labels, value):
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} '
+                f'{value}']
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        """Увеличивает счётчик с указанными значениями меток."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Возвращает текущее значение счётчика."""
+        return self._values.get(labels, 0)
+
+
+class Gauge(Metric):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None,
+                 function=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.function = function
+
+    def set(self, value, *labels):
+        """Устанавливает значение."""
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self):
+        """Вычисляет значение функцией, если она задана, и выводит его."""
+        if self.function is not None:
+            for labels, value in self.function().items():
+                if not isinstance(labels, tuple):
+                    labels = (labels,)
+                self.set(value, *labels)
+        return super().expose()
+
+
+class Histogram(Metric):
+    """Гистограмма значений с накопительными корзинами."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None,
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        """Учитывает наблюдение."""
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = [[0] * len(self.buckets), 0, 0.0]
+                self._values[labels] = state
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def count(self, *labels):
+        """Возвращает число наблюдений."""
+        state = self._values.get(labels)
+        return state[1] if state else 0
+
+    def _sample_lines(self, labels, state):
+        counts, total, amount = state
+        lines = [
+            f'{self.name}_bucket'
+            f'{_format_labels(self.labelnames, labels, [("le", bound)])} '
+            f'{count}'
+            for bound, count in zip(self.buckets, counts)
+        ]
+        lines.append(
+            f'{self.name}_bucket'
+            f'{_format_labels(self.labelnames, labels, [("le", "+Inf")])} '
+            f'{total}')
+        suffix = _format_labels(self.labelnames, labels)
+        lines.append(f'{self.name}_sum{suffix} {amount}')
+        lines.append(f'{self.name}_count{suffix} {total}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику в набор."""
+        with self._lock:
+            self._metrics.append(metric)
+
+    def expose(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+API_REQUESTS = Counter('homework_api_requests_total',
+                       'Запросы к API Практикума по коду ответа', ['code'])
+API_LATENCY = Histogram('homework_api_request_seconds',
+                        'Время запроса к API Практикума')
+FAILURES = Counter('homework_failures_total',
+                   'Ошибки разбора ответа API по функции', ['function'])
+MESSAGES = Counter('homework_messages_total',
+                   'Отправка сообщений в Telegram по результату', ['result'])
+ROUTED = Counter('homework_routed_total',
+                 'Уведомления дополнительным адресатам по виду и результату',
+                 ['kind', 'result'])
+COMMANDS = Counter('homework_commands_total',
+                   'Команды пользователей бота', ['command'])
+LOOP_SECONDS = Histogram('homework_loop_iteration_seconds',
+                         'Длительность одного цикла опроса')
+SLEEP_DRIFT = Histogram('homework_sleep_drift_seconds',
+                        'Опоздание начала опроса относительно плана',
+                        buckets=(0.01, 0.1, 0.5, 1, 5, 15, 60, 300))
+
+
+def count_failures(function):
+    """Декоратор: считает исключения функции в FAILURES."""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            FAILURES.inc(function.__name__)
+            raise
+    return wrapper
+
+
+def register_stats(name, documentation, stats):
+    """Публикует словарь, возвращаемый stats(), как набор gauge-метрик."""
+    return Gauge(name, documentation, ['name'], function=stats)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по адресу /metrics."""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.expose().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port=METRICS_PORT, host=METRICS_HOST):
+    """.
+    Запускает HTTP-сервер метрик в фоновом потоке. Без порта ничего
+    не делает и возвращает None.
+    """
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name='metrics').start()
+    logging.info(METRICS_STARTED.format(host, server.server_port))
+    return server
@@ -0,0 +1,84 @@
+from enum import Enum
+from typing import NamedTuple
+
+
+MISSING_HOMEWORK_NAME = 'Отсутствует имя домашней работы.'
+MISSING_STATUS = 'Отсутствует статус работы.'
+PARSE_STATUS_ERROR = 'Получен неизвестный статус - {}.'
+HOMEWORK_NOT_DICT = ('Возвращен неверный тип данных работы. Ожидается - '
+                     'dict, а получен - {}')
+
+EXTRA_STATUSES = set()
+
+
+class HomeworkStatus(str, Enum):
+    """.
+    Статус проверки домашней работы. Члены перечисления - строки,
+    поэтому сравниваются и хранятся так же, как статусы из API.
+    """
+
+    APPROVED = 'approved'
+    REVIEWING = 'reviewing'
+    REJECTED = 'rejected'
+
+    def __str__(self):
+        return self.value
+
+
+def register_status(status):
+    """.
+    Разрешает статус, которого нет в перечислении, например объявленный
+    в каталоге сообщений. Основной статус возвращается членом
+    HomeworkStatus, остальные - обычной строкой.
+    """
+    try:
+        return HomeworkStatus(status)
+    except ValueError:
+        EXTRA_STATUSES.add(status)
+        return status
+
+
+def parse_homework_status(status):
+    """.
+    Проверяет статус из ответа API: основной статус возвращается членом
+    HomeworkStatus, зарегистрированный из каталога - строкой.
+    """
+    try:
+        return HomeworkStatus(status)
+    except ValueError:
+        if isinstance(status, str) and status in EXTRA_STATUSES:
+            return status
+        raise ValueError(PARSE_STATUS_ERROR.format(status))
+
+
+class Homework(NamedTuple):
+    """Неизменяемая компактная запись о домашней работе из ответа API."""
+
+    id: object
+    name: str
+    status: HomeworkStatus
+    date_updated: str = None
+    reviewer_comment: str = None
+
+    @property
+    def key(self):
+        """Ключ работы в хранилище статусов: id, а без него - имя."""
+        return str(self.name if self.id is None else self.id)
+
+    @classmethod
+    def from_api(cls, data):
+        """.
+        Проверяет работу из ответа API и собирает из неё запись.
+        Готовую запись возвращает без изменений.
+        """
+        if isinstance(data, cls):
+            return data
+        if not isinstance(data, dict):
+            raise TypeError(HOMEWORK_NOT_DICT.format(type(data)))
+        if 'homework_name' not in data:
+            raise KeyError(MISSING_HOMEWORK_NAME)
+        if 'status' not in data:
+            raise KeyError(MISSING_STATUS)
+        status = parse_homework_status(data['status'])
+        return cls(data.get('id'), data['homework_name'], status,
+                   data.get('date_updated'), data.get('reviewer_comment'))
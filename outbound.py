@@ -0,0 +1,180 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+import telegram
+
+import homework
+import metrics
+from rate_limit import TokenBucket
+
+
+OUTBOUND_QUEUE_SIZE = int(os.getenv('OUTBOUND_QUEUE_SIZE', 10000))
+OUTBOUND_WORKERS = int(os.getenv('OUTBOUND_WORKERS', 4))
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv('OUTBOUND_MAX_ATTEMPTS', 5))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', 3))
+
+QUEUE_FULL = 'Очередь исходящих сообщений переполнена, чат {} пропущен'
+RETRY_AFTER = 'Telegram просит подождать {} с перед отправкой в чат {}'
+
+
+class OutboundMessage:
+    """Сообщение в очереди на отправку."""
+
+    __slots__ = ('chat_id', 'text', 'callback', 'attempts')
+
+    def __init__(self, chat_id, text, callback=None):
+        self.chat_id = chat_id
+        self.text = text
+        self.callback = callback
+        self.attempts = 0
+
+
+class OutboundQueue:
+    """.
+    Ограниченная очередь исходящих сообщений Telegram с фоновыми
+    потоками отправки. Соблюдает общий лимит и лимит на чат, при ответе
+    RetryAfter выжидает указанное время и повторяет отправку.
+    """
+
+    def __init__(self, bot, maxsize=OUTBOUND_QUEUE_SIZE,
+                 workers=OUTBOUND_WORKERS, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE, chat_burst=TELEGRAM_CHAT_BURST,
+                 max_attempts=OUTBOUND_MAX_ATTEMPTS, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.bot = bot
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.sleep = sleep
+        self.global_bucket = TokenBucket(global_rate, global_rate, clock)
+        self.counters = dict.fromkeys(
+            ('queued', 'sent', 'failed', 'dropped', 'retried',
+             'max_depth'), 0)
+        self.throttled = 0.0
+        self._queue = queue.Queue(maxsize)
+        self._chat_buckets = {}
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, chat_id, text, callback=None):
+        """.
+        Ставит сообщение в очередь без ожидания. callback(sent) будет
+        вызван после отправки или окончательной ошибки. Возвращает False,
+        если очередь переполнена.
+        """
+        try:
+            self._queue.put_nowait(OutboundMessage(chat_id, text, callback))
+        except queue.Full:
+            self._count('dropped')
+            logging.warning(QUEUE_FULL.format(chat_id))
+            return False
+        self._count('queued')
+        with self._lock:
+            self.counters['max_depth'] = max(self.counters['max_depth'],
+                                             self._queue.qsize())
+        return True
+
+    def start(self):
+        """Запускает потоки отправки."""
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True,
+                                      name=f'outbound-{number}')
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """.
+        Дожидается отправки очереди и останавливает потоки, но не дольше
+        timeout секунд на все потоки вместе.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(None if deadline is None
+                        else max(deadline - self.clock(), 0))
+        self._threads = []
+
+    def join(self):
+        """Ждёт, пока очередь опустеет."""
+        self._queue.join()
+
+    def stats(self):
+        """Возвращает счётчики очереди и её текущую глубину."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['throttled_seconds'] = round(self.throttled, 3)
+        stats['depth'] = self._queue.qsize()
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _chat_bucket(self, chat_id):
+        with self._lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst,
+                                     self.clock)
+                self._chat_buckets[chat_id] = bucket
+            return bucket
+
+    def _throttle(self, bucket):
+        while not bucket.try_acquire():
+            delay = bucket.wait_time()
+            with self._lock:
+                self.throttled += delay
+            self.sleep(delay)
+
+    def _work(self):
+        while True:
+            message = self._queue.get()
+            try:
+                if message is None:
+                    return
+                self._deliver(message)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, message):
+        while True:
+            self._throttle(self._chat_bucket(message.chat_id))
+            self._throttle(self.global_bucket)
+            message.attempts += 1
+            try:
+                self.bot.send_message(message.chat_id, message.text)
+            except telegram.error.RetryAfter as error:
+                if message.attempts >= self.max_attempts:
+                    self._finish(message, False, error)
+                    return
+                self._count('retried')
+                logging.warning(RETRY_AFTER.format(error.retry_after,
+                                                   message.chat_id))
+                self.sleep(error.retry_after)
+                continue
+            except Exception as error:
+                self._finish(message, False, error)
+                return
+            self._finish(message, True)
+            return
+
+    def _finish(self, message, sent, error=None):
+        if sent:
+            self._count('sent')
+            metrics.MESSAGES.inc('sent')
+            logging.debug(homework.MESSAGE_SENT, message.text)
+        else:
+            self._count('failed')
+            metrics.MESSAGES.inc('failed')
+            logging.error(homework.MESSAGE_SENT_ERROR.format(error,
+                                                             message.text))
+        if message.callback is not None:
+            message.callback(sent)
@@ -0,0 +1,193 @@
+from functools import partial
+import json
+import os
+from operator import attrgetter
+from string import Formatter
+import threading
+
+from dotenv import load_dotenv
+
+import homework
+from models import Homework, PARSE_STATUS_ERROR, register_status
+
+
+load_dotenv()
+
+
+DEFAULT_LOCALE = os.getenv('DEFAULT_LOCALE', 'ru')
+MESSAGES_PATH = os.getenv('MESSAGES_PATH')
+
+UNKNOWN_FIELD = 'Неизвестное поле шаблона сообщения - {}'
+CATALOG_INVALID = ('Каталог сообщений должен сопоставлять локали объекты '
+                   'с ключами template и verdicts, а получен - {}')
+
+FIELDS = {
+    'name': attrgetter('name'),
+    'id': attrgetter('id'),
+    'date_updated': attrgetter('date_updated'),
+    'comment': lambda record: record.reviewer_comment or '',
+}
+
+BUILTIN_CATALOG = {
+    'ru': {
+        'template': homework.PARSE_STATUS.format('{name}', '{verdict}'),
+        'verdicts': homework.HOMEWORK_VERDICTS,
+    },
+    'en': {
+        'template': 'The review status of "{name}" has changed. {verdict}',
+        'verdicts': {
+            'approved': 'The work is reviewed: the reviewer liked it. Hooray!',
+            'reviewing': 'The reviewer has started checking the work.',
+            'rejected': 'The work is reviewed: the reviewer left comments.',
+        },
+    },
+}
+
+
+class Template:
+    """.
+    Шаблон сообщения, разобранный один раз: постоянные поля (verdict,
+    status) уже подставлены, а для полей работы хранятся функции
+    извлечения, поэтому рендеринг - это только склейка строк.
+    """
+
+    __slots__ = ('parts', 'tail')
+
+    def __init__(self, source, constants):
+        parts = []
+        literal = ''
+        for text, field, spec, conversion in Formatter().parse(source):
+            literal += text
+            if field is None:
+                continue
+            if field in constants:
+                literal += format(constants[field], spec)
+            elif field in FIELDS:
+                parts.append((literal, FIELDS[field], spec))
+                literal = ''
+            else:
+                raise KeyError(UNKNOWN_FIELD.format(field))
+        self.parts = tuple(parts)
+        self.tail = literal
+
+    def render(self, record):
+        """Подставляет поля работы в шаблон."""
+        pieces = []
+        for literal, getter, spec in self.parts:
+            pieces.append(literal)
+            pieces.append(format(getter(record), spec))
+        pieces.append(self.tail)
+        return ''.join(pieces)
+
+
+class MessageRenderer:
+    """.
+    Собирает уведомления о смене статуса по каталогу сообщений.
+    Шаблоны компилируются при первом обращении и кэшируются по паре
+    (локаль, статус). Неизвестная локаль заменяется локалью по
+    умолчанию, а вердикт, которого нет в локали, берётся из неё же.
+    """
+
+    def __init__(self, catalog=BUILTIN_CATALOG, default_locale=DEFAULT_LOCALE):
+        self.catalog = catalog
+        self.default_locale = default_locale
+        self._templates = {}
+        self._renderers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def statuses(self):
+        """Все статусы, для которых в каталоге есть вердикт."""
+        return {status for messages in self.catalog.values()
+                for status in messages.get('verdicts', {})}
+
+    def locale(self, locale=None):
+        """Возвращает локаль из каталога, ближайшую к запрошенной."""
+        if locale in self.catalog:
+            return locale
+        if locale and locale.split('-')[0] in self.catalog:
+            return locale.split('-')[0]
+        return self.default_locale
+
+    def _messages(self, locale, name):
+        value = self.catalog[locale].get(name)
+        if value is None:
+            value = self.catalog[self.default_locale][name]
+        return value
+
+    def verdict(self, status, locale=None):
+        """Текст вердикта для статуса."""
+        locale = self.locale(locale)
+        for messages in (self.catalog[locale],
+                         self.catalog[self.default_locale]):
+            verdict = messages.get('verdicts', {}).get(status)
+            if verdict is not None:
+                return verdict
+        raise ValueError(PARSE_STATUS_ERROR.format(status))
+
+    def template(self, status, locale=None):
+        """Возвращает скомпилированный шаблон для статуса и локали."""
+        key = (self.locale(locale), status)
+        template = self._templates.get(key)
+        if template is None:
+            template = Template(
+                self._messages(key[0], 'template'),
+                {'verdict': self.verdict(status, key[0]),
+                 'status': str(status)})
+            with self._lock:
+                template = self._templates.setdefault(key, template)
+        return template
+
+    def render(self, record, locale=None):
+        """Собирает уведомление о смене статуса работы."""
+        record = Homework.from_api(record)
+        return self.template(record.status, locale).render(record)
+
+    def for_locale(self, locale=None):
+        """Функция рендеринга для локали, как у homework.parse_status."""
+        locale = self.locale(locale)
+        renderer = self._renderers.get(locale)
+        if renderer is None:
+            renderer = self._renderers.setdefault(
+                locale, partial(self.render, locale=locale))
+        return renderer
+
+
+def load_catalog(path):
+    """.
+    Загружает каталог сообщений из JSON-файла поверх встроенного и
+    регистрирует статусы, для которых в нём объявлены вердикты.
+    """
+    with open(path, encoding='utf-8') as file:
+        loaded = json.load(file)
+    if not isinstance(loaded, dict) or not all(
+            isinstance(messages, dict)
+            and isinstance(messages.get('verdicts', {}), dict)
+            for messages in loaded.values()):
+        raise ValueError(CATALOG_INVALID.format(type(loaded)))
+    catalog = {locale: dict(messages, verdicts=dict(messages['verdicts']))
+               for locale, messages in BUILTIN_CATALOG.items()}
+    for locale, messages in loaded.items():
+        merged = catalog.setdefault(locale, {'verdicts': {}})
+        if 'template' in messages:
+            merged['template'] = messages['template']
+        merged['verdicts'].update(messages.get('verdicts', {}))
+    for messages in catalog.values():
+        for status in messages['verdicts']:
+            register_status(status)
+    return catalog
+
+
+_renderer = None
+
+
+def get_renderer():
+    """.
+    Общий рендерер процесса: встроенный каталог, дополненный файлом
+    MESSAGES_PATH, если он задан.
+    """
+    global _renderer
+    if _renderer is None:
+        catalog = load_catalog(MESSAGES_PATH) if MESSAGES_PATH else None
+        _renderer = MessageRenderer(catalog or BUILTIN_CATALOG)
+    return _renderer
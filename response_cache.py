@@ -0,0 +1,124 @@
+from collections import OrderedDict
+import hashlib
+from http import HTTPStatus
+import json
+import os
+import threading
+
+import homework
+from subscriptions import token_key
+
+
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 10000))
+
+
+class CacheEntry:
+    """Закэшированный ответ API: валидаторы, хэш работ и разобранный JSON."""
+
+    __slots__ = ('validators', 'digest', 'payload', 'size')
+
+    def __init__(self, validators, digest, payload, size):
+        self.validators = validators
+        self.digest = digest
+        self.payload = payload
+        self.size = size
+
+
+class ResponseCache:
+    """.
+    LRU-кэш ответов API по ключу (токен, from_date). Хранит ETag и
+    Last-Modified для условных запросов и хэш списка работ, чтобы не
+    обрабатывать повторно ответ, в котором работы не изменились.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.counters = dict.fromkeys(
+            ('hits', 'misses', 'not_modified', 'unchanged_body',
+             'bytes_saved'), 0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Возвращает запись кэша или None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        """Сохраняет запись, вытесняя самую старую при переполнении."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def count(self, name, amount=1):
+        """Увеличивает счётчик статистики."""
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        """Возвращает счётчики и долю попаданий."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+def _validators(response_from_api):
+    validators = {}
+    etag = response_from_api.headers.get('ETag')
+    if etag:
+        validators['If-None-Match'] = etag
+    last_modified = response_from_api.headers.get('Last-Modified')
+    if last_modified:
+        validators['If-Modified-Since'] = last_modified
+    return validators
+
+
+def homeworks_digest(response):
+    """.
+    Хэш списка работ ответа. current_date меняется в каждом ответе,
+    поэтому в хэш не входит.
+    """
+    homeworks = json.dumps(response.get('homeworks'), sort_keys=True,
+                           default=str)
+    return hashlib.sha1(homeworks.encode()).digest()
+
+
+def fetch(cache, headers, timestamp):
+    """.
+    Запрашивает статусы через кэш. Возвращает ответ API и признак того,
+    что работы в нём изменились с прошлого запроса; для неизменного
+    ответа сравнение со статусами можно пропустить, если все они
+    уже доставлены.
+    """
+    key = (token_key(headers['Authorization']), timestamp)
+    payload = {'from_date': timestamp}
+    entry = cache.get(key)
+    request_headers = headers
+    if entry is not None and entry.validators:
+        request_headers = {**headers, **entry.validators}
+    response_from_api = homework.send_api_request(request_headers, payload)
+    status_code = response_from_api.status_code
+    if entry is not None and status_code == HTTPStatus.NOT_MODIFIED:
+        cache.count('hits')
+        cache.count('not_modified')
+        cache.count('bytes_saved', entry.size)
+        return entry.payload, False
+    response = homework.check_api_reply(response_from_api, headers, payload)
+    size = len(response_from_api.content)
+    digest = homeworks_digest(response)
+    cache.put(key, CacheEntry(_validators(response_from_api), digest,
+                              response, size))
+    if entry is not None and digest == entry.digest:
+        cache.count('hits')
+        cache.count('unchanged_body')
+        return response, False
+    cache.count('misses')
+    return response, True
@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import logging
+import os
+import threading
+
+import requests
+
+import homework
+import http_pool
+import metrics
+from subscriptions import CHAT
+
+
+ROUTING_WORKERS = int(os.getenv('ROUTING_WORKERS', 4))
+SINK_TIMEOUT = float(os.getenv('SINK_TIMEOUT', 10))
+
+ROUTE_FAILED = 'Не удалось отправить уведомление адресату {}: {}'
+SINK_REJECTED = 'Приёмник ответил кодом {}'
+
+
+class Router:
+    """.
+    Рассылает уведомление дополнительным адресатам подписки, параллельно
+    с отправкой в её основной чат. Чаты Telegram идут через очередь
+    отправки, если она задана, остальные адресаты - через собственный пул
+    потоков. Курсор подписки зависит только от основного чата, поэтому
+    упавший приёмник не вызывает повторов. Смены статусов, уже разосланные
+    адресатам, не рассылаются снова, пока основной чат их не получит:
+    повторные попытки идут только в него.
+    """
+
+    def __init__(self, bot, outbox=None, workers=ROUTING_WORKERS,
+                 sink_timeout=SINK_TIMEOUT):
+        self.bot = bot
+        self.outbox = outbox
+        self.sink_timeout = sink_timeout
+        self.counters = dict.fromkeys(('routed', 'failed'), 0)
+        self._routed = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='routing')
+
+    def send(self, subscription, message, changes=None):
+        """.
+        Ставит уведомление в отправку всем дополнительным адресатам.
+        Если все смены статусов changes уже разосланы и ждут доставки в
+        основной чат, уведомление не рассылается повторно.
+        """
+        if not subscription.destinations or (
+                changes is not None
+                and not self._mark_routed(subscription.key, changes)):
+            return 0
+        for destination in subscription.destinations:
+            if self.outbox is not None and destination.kind == CHAT:
+                if not self.outbox.submit(destination.address, message,
+                                          partial(self._count, destination)):
+                    self._count(destination, False)
+            else:
+                self._executor.submit(self._send, destination, subscription,
+                                      message)
+        return len(subscription.destinations)
+
+    def delivered(self, subscription):
+        """.
+        Отмечает, что уведомление дошло до основного чата подписки, и
+        следующие смены статусов снова рассылаются адресатам.
+        """
+        with self._lock:
+            self._routed.pop(subscription.key, None)
+
+    def post(self, url, subscription, message):
+        """Отправляет уведомление в HTTP-приёмник в виде JSON."""
+        pool = http_pool.active()
+        http_post = requests.post if pool is None else pool.post
+        response = http_post(url, timeout=self.sink_timeout, json={
+            'subscription': subscription.key,
+            'chat_id': subscription.chat_id,
+            'text': message,
+        })
+        if response.status_code >= 400:
+            raise ConnectionError(SINK_REJECTED.format(response.status_code))
+        return True
+
+    def close(self):
+        """Дожидается отправки поставленных уведомлений."""
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """Возвращает счётчики рассылки."""
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, destination, sent):
+        with self._lock:
+            self.counters['routed' if sent else 'failed'] += 1
+        metrics.ROUTED.inc(destination.kind, 'sent' if sent else 'failed')
+
+    def _mark_routed(self, key, changes):
+        with self._lock:
+            routed = self._routed.get(key, {})
+            if changes.items() <= routed.items():
+                return False
+            self._routed[key] = {**routed, **changes}
+            return True
+
+    def _send(self, destination, subscription, message):
+        try:
+            if destination.kind == CHAT:
+                sent = homework.send_to_chat(self.bot, destination.address,
+                                             message)
+            else:
+                sent = self.post(destination.address, subscription, message)
+        except Exception as error:
+            logging.error(ROUTE_FAILED.format(destination, error))
+            sent = False
+        self._count(destination, sent)
+        return sent
@@ -0,0 +1,74 @@
+import os
+import random
+import threading
+
+
+POLL_MIN_INTERVAL = int(os.getenv('POLL_MIN_INTERVAL', 120))
+POLL_MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', 3600))
+POLL_BACKOFF = float(os.getenv('POLL_BACKOFF', 1.5))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+
+ACTIVE_STATUSES = frozenset(['reviewing'])
+
+
+class AdaptiveScheduler:
+    """.
+    Подбирает интервал опроса каждой подписки: минимальный, пока работа
+    на проверке, базовый после смены статуса и растущий в backoff раз
+    при простое. Случайный разброс jitter разводит запросы подписок
+    во времени.
+    """
+
+    def __init__(self, base, min_interval=POLL_MIN_INTERVAL,
+                 max_interval=POLL_MAX_INTERVAL, backoff=POLL_BACKOFF,
+                 jitter=POLL_JITTER, rand=random.random):
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.rand = rand
+        self.polls = 0
+        self.covered = 0.0
+        self._intervals = {}
+        self._lock = threading.Lock()
+
+    def next_interval(self, key, statuses=(), changed=False):
+        """.
+        Возвращает задержку до следующего опроса подписки по известным
+        статусам её работ и факту изменения в последнем опросе.
+        """
+        with self._lock:
+            if ACTIVE_STATUSES.intersection(statuses):
+                interval = self.min_interval
+            elif changed or key not in self._intervals:
+                interval = self.base
+            else:
+                interval = self._intervals[key] * self.backoff
+            interval = min(max(interval, self.min_interval),
+                           self.max_interval)
+            self._intervals[key] = interval
+            spread = interval * self.jitter * (2 * self.rand() - 1)
+            delay = min(max(interval + spread, self.min_interval),
+                        self.max_interval)
+            self.polls += 1
+            self.covered += delay
+        return delay
+
+    def forget(self, key):
+        """Сбрасывает интервал удалённой подписки."""
+        with self._lock:
+            self._intervals.pop(key, None)
+
+    def report(self):
+        """.
+        Возвращает число опросов и сколько запросов сэкономлено по
+        сравнению с опросом каждые base секунд за то же время.
+        """
+        with self._lock:
+            fixed_polls = self.covered / self.base
+            return {
+                'polls': self.polls,
+                'fixed_polls': round(fixed_polls),
+                'saved': round(fixed_polls - self.polls),
+            }
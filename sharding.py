@@ -0,0 +1,329 @@
+import bisect
+from functools import partial
+import hashlib
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+import telegram
+
+import engine
+import exceptions
+import homework
+import http_pool
+import logging_setup
+import metrics
+import shutdown
+import state_store
+from subscriptions import SubscriptionRegistry
+
+
+load_dotenv()
+
+
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', os.cpu_count() or 1))
+SHARD_REPLICAS = int(os.getenv('SHARD_REPLICAS', 100))
+SHARD_DB_PATH = os.getenv('SHARD_DB_PATH', 'shards.sqlite3')
+SHARD_HEARTBEAT = float(os.getenv('SHARD_HEARTBEAT', 10))
+SHARD_TTL = float(os.getenv('SHARD_TTL', 30))
+SHARD_HOST = os.getenv('SHARD_HOST', socket.gethostname())
+
+SHARD_REBALANCED = ('Шард {}: воркеров - {}, подписок - {}, '
+                    'получено - {}, отдано - {}')
+SHARD_STOPPED = 'Шард {} остановлен'
+WORKER_DIED = 'Воркер {} завершился с кодом {}, перезапуск'
+SHARED_STORE_REQUIRED = ('Шардированный запуск требует SQLite-хранилища '
+                         'состояния в STATE_STORE_PATH, а задано - {}')
+
+
+def _position(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """.
+    Консистентное хеширование: каждый узел занимает replicas точек на
+    кольце, ключ принадлежит ближайшему по часовой стрелке узлу. При
+    добавлении или удалении узла переезжает примерно 1/N ключей.
+    """
+
+    def __init__(self, nodes=(), replicas=SHARD_REPLICAS):
+        self.replicas = replicas
+        self._nodes = set()
+        self._positions = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self):
+        """Отсортированный список узлов кольца."""
+        return sorted(self._nodes)
+
+    def add(self, node):
+        """Добавляет узел на кольцо."""
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self.replicas):
+            position = _position(f'{node}#{replica}')
+            self._owners[position] = node
+            bisect.insort(self._positions, position)
+
+    def remove(self, node):
+        """Убирает узел с кольца."""
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        for replica in range(self.replicas):
+            position = _position(f'{node}#{replica}')
+            if self._owners.get(position) == node:
+                del self._owners[position]
+                index = bisect.bisect_left(self._positions, position)
+                del self._positions[index]
+
+    def node_for(self, key):
+        """Возвращает узел, которому принадлежит ключ, или None."""
+        if not self._positions:
+            return None
+        index = bisect.bisect(self._positions, _position(key))
+        return self._owners[self._positions[index % len(self._positions)]]
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+class SqliteCoordinator:
+    """.
+    Реестр живых воркеров в SQLite: воркер периодически отмечается,
+    а живыми считаются отметившиеся не позже ttl секунд назад. Для
+    нескольких машин файл должен лежать на общем диске.
+    """
+
+    SCHEMA = ('CREATE TABLE IF NOT EXISTS workers ('
+              'worker_id TEXT PRIMARY KEY, heartbeat REAL NOT NULL)')
+
+    def __init__(self, path=SHARD_DB_PATH, ttl=SHARD_TTL, clock=time.time):
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self.clock = clock
+        self._connection = sqlite3.connect(self.path, timeout=30,
+                                           check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(self.SCHEMA)
+
+    def heartbeat(self, worker_id):
+        """Отмечает воркер живым."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                (worker_id, self.clock()))
+
+    def leave(self, worker_id):
+        """Удаляет воркер из реестра."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+
+    def live_workers(self):
+        """Возвращает отсортированный список живых воркеров."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT worker_id FROM workers WHERE heartbeat >= ? '
+                'ORDER BY worker_id', (self.clock() - self.ttl,))
+            return [worker_id for worker_id, in rows]
+
+    def close(self):
+        """Закрывает соединение."""
+        self._connection.close()
+
+
+class ShardWorker:
+    """.
+    Воркер шарда: опрашивает только подписки, которые кольцо отдаёт ему,
+    и пересчитывает свою долю, когда меняется состав живых воркеров.
+    Полученные подписки продолжают с курсора, сохранённого прежним
+    владельцем; во время переезда возможен повтор уведомления.
+    """
+
+    def __init__(self, worker_id, source, coordinator, bot, store=None,
+                 replicas=SHARD_REPLICAS, heartbeat_interval=SHARD_HEARTBEAT,
+                 **engine_options):
+        self.worker_id = worker_id
+        self.source = source
+        self.coordinator = coordinator
+        self.store = store or state_store.MemoryStateStore()
+        self.replicas = replicas
+        self.heartbeat_interval = heartbeat_interval
+        self.ring = HashRing(replicas=replicas)
+        self.registry = SubscriptionRegistry()
+        self.engine = engine.PollingEngine(self.registry, bot, self.store,
+                                           **engine_options)
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def owns(self, key):
+        """Принадлежит ли ключ этому воркеру."""
+        return self.ring.node_for(key) == self.worker_id
+
+    def rebalance(self):
+        """.
+        Отмечается в координаторе, перестраивает кольцо по живым воркерам
+        и забирает или отдаёт подписки, а у оставшихся обновляет чат,
+        локаль и адресатов из источника. Возвращает множества полученных
+        и отданных ключей.
+        """
+        with self._lock:
+            return self._rebalance()
+
+    def _rebalance(self):
+        self.coordinator.heartbeat(self.worker_id)
+        live = self.coordinator.live_workers()
+        if self.worker_id not in live:
+            live.append(self.worker_id)
+        if sorted(live) != self.ring.nodes:
+            self.ring = HashRing(live, self.replicas)
+        owned = {key for key in self.source.keys() if self.owns(key)}
+        current = set(self.registry.keys())
+        released = current - owned
+        acquired = owned - current
+        for key in released:
+            self.registry.remove(key)
+        for key in owned & current:
+            subscription = self.source.get(key)
+            self.registry.add(subscription.token, subscription.chat_id,
+                              locale=subscription.locale,
+                              destinations=subscription.destinations)
+        if released:
+            self.store.flush()
+        if acquired:
+            self.store.reload(acquired)
+        for key in acquired:
+            subscription = self.source.get(key)
+            self.registry.add(subscription.token, subscription.chat_id,
+                              self.store.get_cursor(key,
+                                                    subscription.timestamp),
+                              subscription.locale, subscription.destinations)
+        if acquired:
+            self.engine.sync()
+        if acquired or released:
+            logging.info(SHARD_REBALANCED.format(
+                self.worker_id, len(live), len(self.registry),
+                len(acquired), len(released)))
+        return acquired, released
+
+    def run(self):
+        """Опрашивает свою долю подписок до вызова stop()."""
+        self.rebalance()
+        thread = threading.Thread(target=self.engine.run,
+                                  name=f'shard-{self.worker_id}')
+        thread.start()
+        try:
+            while not self._stopped.wait(self.heartbeat_interval):
+                self.rebalance()
+        finally:
+            self.coordinator.leave(self.worker_id)
+            self.engine.stop()
+            thread.join()
+            logging.info(SHARD_STOPPED.format(self.worker_id))
+
+    def stop(self):
+        """Останавливает воркер."""
+        self._stopped.set()
+
+
+def worker_id(index, host=SHARD_HOST):
+    """Имя воркера, уникальное среди машин с общим координатором."""
+    return f'{host}-{index}'
+
+
+def check_shared_store(path):
+    """.
+    Проверяет, что путь хранилища указывает на общую для воркеров базу
+    SQLite: без пути каждый воркер хранил бы состояние в памяти, а
+    JSON-файл перезаписывается целиком, поэтому rebalance не видел бы
+    чужих курсоров.
+    """
+    if not path or os.fspath(path).endswith('.json'):
+        logging.critical(SHARED_STORE_REQUIRED.format(path))
+        raise ValueError(SHARED_STORE_REQUIRED.format(path))
+
+
+def run_worker(index):
+    """Точка входа процесса-воркера."""
+    check_shared_store(homework.STATE_STORE_PATH)
+    name = worker_id(index)
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(levelname)s - %(processName)s - '
+               '%(funcName)s - %(lineno)s - %(message)s',
+        handlers=logging_setup.queue_handlers(f'{__file__}.{name}.log')
+    )
+    source = engine.load_subscriptions()
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    http_pool.enable(maxsize=engine.POLL_WORKERS)
+    store = state_store.open_store(homework.STATE_STORE_PATH)
+    coordinator = SqliteCoordinator()
+    if metrics.METRICS_PORT:
+        metrics.serve(port=metrics.METRICS_PORT + index)
+    worker = ShardWorker(name, source, coordinator, bot, store)
+    try:
+        shutdown.run_until_signal(
+            worker.run, worker.stop,
+            partial(engine.reload_subscriptions, source, worker.rebalance))
+    finally:
+        http_pool.disable()
+        store.close()
+        coordinator.close()
+
+
+def supervise(workers=SHARD_WORKERS, poll_interval=5):
+    """.
+    Запускает workers процессов-воркеров и перезапускает упавшие.
+    По сигналу остановки передаёт SIGTERM воркерам и ждёт, пока они
+    сохранят состояние.
+    """
+    check_shared_store(homework.STATE_STORE_PATH)
+    context = multiprocessing.get_context('spawn')
+    processes = {}
+
+    def start(index):
+        process = context.Process(target=run_worker, args=(index,),
+                                  name=worker_id(index), daemon=True)
+        process.start()
+        processes[index] = process
+
+    for index in range(workers):
+        start(index)
+    signals = shutdown.GracefulShutdown().install()
+    try:
+        while True:
+            with signals.interruptible():
+                time.sleep(poll_interval)
+            for index, process in list(processes.items()):
+                if not process.is_alive():
+                    logging.warning(WORKER_DIED.format(process.name,
+                                                       process.exitcode))
+                    start(index)
+    except exceptions.ShutdownRequested:
+        pass
+    finally:
+        signals.uninstall()
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+    )
+    supervise()
@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+import logging
+import signal
+import threading
+import time
+
+import exceptions
+
+
+STOP_SIGNALS = ('SIGTERM', 'SIGINT')
+RELOAD_SIGNAL = 'SIGHUP'
+SIGNAL_CHECK_INTERVAL = 0.5
+
+SHUTDOWN_REQUESTED = 'Получен сигнал остановки'
+RELOAD_REQUESTED = 'Получен сигнал перечитать настройки'
+
+
+class GracefulShutdown:
+    """.
+    Обработчик сигналов остановки и перезагрузки настроек. Обработчики
+    только выставляют флаги, а прервать можно лишь ожидание внутри
+    interruptible(), поэтому отправка сообщения или запись состояния
+    всегда доводятся до конца.
+    """
+
+    def __init__(self):
+        self.stopping = False
+        self.reload_pending = False
+        self._interruptible = False
+        self._previous = {}
+
+    def install(self):
+        """.
+        Ставит обработчики SIGTERM/SIGINT и SIGHUP. Вне главного потока
+        ничего не делает.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return self
+        for name in STOP_SIGNALS:
+            self._install(name, self.handle_stop)
+        self._install(RELOAD_SIGNAL, self.handle_reload)
+        return self
+
+    def uninstall(self):
+        """Возвращает прежние обработчики сигналов."""
+        for number, handler in self._previous.items():
+            signal.signal(number, handler)
+        self._previous = {}
+
+    def _install(self, name, handler):
+        number = getattr(signal, name, None)
+        if number is not None:
+            self._previous[number] = signal.signal(number, handler)
+
+    def handle_stop(self, signum=None, frame=None):
+        """Запоминает запрос остановки и прерывает текущее ожидание."""
+        self.stopping = True
+        if self._interruptible:
+            self._interruptible = False
+            raise exceptions.ShutdownRequested(SHUTDOWN_REQUESTED)
+
+    def handle_reload(self, signum=None, frame=None):
+        """Запоминает запрос перечитать настройки."""
+        self.reload_pending = True
+
+    def take_reload(self):
+        """Возвращает True один раз после каждого запроса перезагрузки."""
+        if not self.reload_pending:
+            return False
+        self.reload_pending = False
+        logging.info(RELOAD_REQUESTED)
+        return True
+
+    @contextmanager
+    def interruptible(self):
+        """.
+        Блок, который сигнал остановки прерывает исключением
+        ShutdownRequested. Если остановка уже запрошена, исключение
+        выбрасывается сразу.
+        """
+        self._interruptible = True
+        try:
+            if self.stopping:
+                raise exceptions.ShutdownRequested(SHUTDOWN_REQUESTED)
+            yield
+        finally:
+            self._interruptible = False
+
+
+def run_until_signal(run, stop, reload=None,
+                     interval=SIGNAL_CHECK_INTERVAL):
+    """.
+    Выполняет run() в фоновом потоке до SIGTERM/SIGINT, после чего
+    вызывает stop() и ждёт, пока run() доведёт начатую работу до конца.
+    По SIGHUP вызывает reload() в главном потоке.
+    """
+    shutdown = GracefulShutdown().install()
+    thread = threading.Thread(target=run, name='runner')
+    thread.start()
+    try:
+        while thread.is_alive() and not shutdown.stopping:
+            time.sleep(interval)
+            if reload is not None and shutdown.take_reload():
+                reload()
+    finally:
+        stop()
+        thread.join()
+        shutdown.uninstall()
+
+
+def add_async_handlers(loop, stop, reload=None):
+    """.
+    Ставит обработчики сигналов в цикл asyncio: остановка вызывает
+    stop(), SIGHUP - reload(). Без поддержки сигналов ничего не делает.
+    """
+    handlers = [(name, stop) for name in STOP_SIGNALS]
+    if reload is not None:
+        handlers.append((RELOAD_SIGNAL, reload))
+    for name, callback in handlers:
+        number = getattr(signal, name, None)
+        if number is None:
+            continue
+        try:
+            loop.add_signal_handler(number, callback)
+        except (NotImplementedError, RuntimeError):
+            return
@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+STATE_BATCH_SIZE = int(os.getenv('STATE_BATCH_SIZE', 100))
+STATE_FLUSH_INTERVAL = int(os.getenv('STATE_FLUSH_INTERVAL', 30))
+
+FLUSH_FAILED = 'Не удалось сохранить состояние, повтор позже: {}'
+
+
+class MemoryStateStore:
+    """.
+    Хранит курсор current_date, последние отправленные статусы и
+    названия работ каждой подписки. Изменения копятся в памяти и
+    сбрасываются пачкой: после batch_size изменений или через
+    flush_interval секунд.
+    """
+
+    def __init__(self, batch_size=STATE_BATCH_SIZE,
+                 flush_interval=STATE_FLUSH_INTERVAL, clock=time.monotonic):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._cursors = {}
+        self._statuses = {}
+        self._names = {}
+        self._dirty = set()
+        self._pending = 0
+        self._flushed_at = clock()
+        self._lock = threading.RLock()
+        self._load()
+
+    def get_cursor(self, key, default=0):
+        """Возвращает сохранённый курсор подписки."""
+        return self._cursors.get(key, default)
+
+    def get_statuses(self, key):
+        """Возвращает копию словаря работа -> последний статус."""
+        with self._lock:
+            return dict(self._statuses.get(key, {}))
+
+    def get_names(self, key):
+        """Возвращает копию словаря работа -> название работы."""
+        with self._lock:
+            return dict(self._names.get(key, {}))
+
+    def record(self, key, cursor, statuses=None, names=None):
+        """Запоминает курсор, отправленные статусы и названия работ."""
+        with self._lock:
+            self._cursors[key] = cursor
+            if statuses:
+                self._statuses.setdefault(key, {}).update(statuses)
+            if names:
+                self._names.setdefault(key, {}).update(names)
+            self._dirty.add(key)
+            self._pending += 1
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        """.
+        Сбрасывает изменения, если набралась пачка или истёк интервал.
+        Ошибку записи пишет в лог и оставляет изменения до следующей
+        попытки, чтобы она не остановила цикл опроса.
+        """
+        with self._lock:
+            if not self._pending:
+                return False
+            if (self._pending < self.batch_size
+                    and self.clock() - self._flushed_at
+                    < self.flush_interval):
+                return False
+        try:
+            self.flush()
+        except Exception as error:
+            logging.error(FLUSH_FAILED.format(error))
+            return False
+        return True
+
+    def flush(self):
+        """.
+        Немедленно сохраняет накопленные изменения. Если запись не
+        удалась, изменения остаются в очереди до следующей попытки.
+        """
+        with self._lock:
+            dirty = self._dirty
+            pending = self._pending
+            self._dirty = set()
+            self._pending = 0
+            self._flushed_at = self.clock()
+            if not dirty:
+                return
+            try:
+                self._write(dirty)
+            except BaseException:
+                self._dirty |= dirty
+                self._pending += pending
+                raise
+
+    def close(self):
+        """Сохраняет изменения и освобождает ресурсы."""
+        self.flush()
+
+    def reload(self, keys):
+        """.
+        Перечитывает из хранилища состояние подписок, которые мог изменить
+        другой процесс. Несохранённые изменения этих подписок теряются.
+        """
+        with self._lock:
+            self._reload(set(keys))
+
+    def _load(self):
+        pass
+
+    def _reload(self, keys):
+        pass
+
+    def _write(self, dirty):
+        pass
+
+
+class JsonFileStateStore(MemoryStateStore):
+    """Хранилище состояния в JSON-файле с атомарной перезаписью."""
+
+    def __init__(self, path, **kwargs):
+        self.path = os.fspath(path)
+        super().__init__(**kwargs)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as file:
+            state = json.load(file)
+        self._cursors = state.get('cursors', {})
+        self._statuses = state.get('statuses', {})
+        self._names = state.get('names', {})
+
+    def _reload(self, keys):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as file:
+            state = json.load(file)
+        for key in keys:
+            for name, values in (('cursors', self._cursors),
+                                 ('statuses', self._statuses),
+                                 ('names', self._names)):
+                if key in state.get(name, {}):
+                    values[key] = state[name][key]
+
+    def _write(self, dirty):
+        state = {'cursors': self._cursors, 'statuses': self._statuses,
+                 'names': self._names}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, tmp_path = tempfile.mkstemp(dir=directory,
+                                                suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(state, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class SqliteStateStore(MemoryStateStore):
+    """Хранилище состояния в SQLite, пишет только изменённые подписки."""
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cursors ('
+        'key TEXT PRIMARY KEY, cursor INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS statuses ('
+        'key TEXT NOT NULL, homework TEXT NOT NULL, status TEXT NOT NULL, '
+        'name TEXT, PRIMARY KEY (key, homework))',
+    )
+
+    def __init__(self, path, **kwargs):
+        self.path = os.fspath(path)
+        self._connection = sqlite3.connect(self.path,
+                                           check_same_thread=False)
+        with self._connection:
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+        super().__init__(**kwargs)
+
+    def _load(self):
+        rows = self._connection.execute('SELECT key, cursor FROM cursors')
+        self._cursors = dict(rows)
+        rows = self._connection.execute(
+            'SELECT key, homework, status, name FROM statuses')
+        for key, homework, status, name in rows:
+            self._statuses.setdefault(key, {})[homework] = status
+            if name is not None:
+                self._names.setdefault(key, {})[homework] = name
+
+    def _reload(self, keys):
+        for key in keys:
+            row = self._connection.execute(
+                'SELECT cursor FROM cursors WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self._cursors[key] = row[0]
+            rows = self._connection.execute(
+                'SELECT homework, status, name FROM statuses WHERE key = ?',
+                (key,)).fetchall()
+            if rows:
+                self._statuses[key] = {homework: status
+                                       for homework, status, _ in rows}
+                self._names[key] = {homework: name
+                                    for homework, _, name in rows
+                                    if name is not None}
+
+    def _write(self, dirty):
+        cursors = [(key, self._cursors[key]) for key in dirty]
+        statuses = [
+            (key, homework, status, self._names.get(key, {}).get(homework))
+            for key in dirty
+            for homework, status in self._statuses.get(key, {}).items()
+        ]
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)', cursors)
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?, ?)',
+                statuses)
+
+    def close(self):
+        """Сохраняет изменения и закрывает соединение."""
+        super().close()
+        self._connection.close()
+
+
+def open_store(path=None, **kwargs):
+    """.
+    Открывает хранилище по пути: .json - JSON-файл, другой путь - SQLite,
+    без пути - хранилище в памяти.
+    """
+    if not path:
+        return MemoryStateStore(**kwargs)
+    if os.fspath(path).endswith('.json'):
+        return JsonFileStateStore(path, **kwargs)
+    return SqliteStateStore(path, **kwargs)
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import threading
+from typing import NamedTuple
+
+
+INVALID_SUBSCRIPTION = 'Некорректная подписка: {}'
+SUBSCRIPTIONS_NOT_LIST = ('Файл подписок должен содержать список,'
+                          'а получен - {}')
+INVALID_DESTINATION = 'Некорректный адресат уведомлений: {}'
+INVALID_ENTRY = 'Некорректная подписка №{} в файле, chat_id - {}'
+
+CHAT = 'chat'
+WEBHOOK = 'webhook'
+
+
+def token_key(token):
+    """Возвращает короткий ключ подписки, не раскрывающий токен."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class Destination(NamedTuple):
+    """Дополнительный адресат уведомлений: чат или канал Telegram либо URL."""
+
+    kind: str
+    address: object
+
+
+def parse_destination(entry):
+    """.
+    Собирает адресата из записи файла подписок: id чата, {"chat_id": ...}
+    или {"webhook": "http://..."}.
+    """
+    if isinstance(entry, dict):
+        if entry.get('chat_id'):
+            return Destination(CHAT, entry['chat_id'])
+        if entry.get('webhook'):
+            return Destination(WEBHOOK, entry['webhook'])
+    elif isinstance(entry, (int, str)) and entry:
+        return Destination(CHAT, entry)
+    raise ValueError(INVALID_DESTINATION.format(entry))
+
+
+class Subscription:
+    """Подписка одного студента на статусы домашних работ."""
+
+    __slots__ = ('token', 'chat_id', 'timestamp', 'key', 'headers', 'locale',
+                 'destinations')
+
+    def __init__(self, token, chat_id, timestamp=0, locale=None,
+                 destinations=()):
+        self.token = token
+        self.chat_id = chat_id
+        self.timestamp = timestamp
+        self.locale = locale
+        self.destinations = tuple(destinations)
+        self.key = token_key(token)
+        self.headers = {'Authorization': f'OAuth {token}'}
+
+    def __repr__(self):
+        return f'Subscription(key={self.key!r}, chat_id={self.chat_id!r})'
+
+
+class SubscriptionRegistry:
+    """Потокобезопасный реестр подписок: токен -> чат и курсор."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+        self.coalesced = 0
+
+    def add(self, token, chat_id, timestamp=0, locale=None, destinations=()):
+        """.
+        Регистрирует подписку или обновляет чат, локаль и дополнительных
+        адресатов существующей.
+        """
+        if not token or not chat_id:
+            raise ValueError(INVALID_SUBSCRIPTION.format(chat_id))
+        key = token_key(token)
+        with self._lock:
+            subscription = self._items.get(key)
+            if subscription is None:
+                subscription = Subscription(token, chat_id, timestamp,
+                                            locale, destinations)
+                self._items[key] = subscription
+            else:
+                subscription.chat_id = chat_id
+                subscription.locale = locale
+                subscription.destinations = tuple(destinations)
+        return subscription
+
+    def extend(self, key, destinations):
+        """.
+        Добавляет подписке дополнительных адресатов, пропуская её
+        основной чат и уже известных адресатов.
+        """
+        with self._lock:
+            subscription = self._items[key]
+            known = {(CHAT, str(subscription.chat_id))}
+            known.update((destination.kind, str(destination.address))
+                         for destination in subscription.destinations)
+            added = []
+            for destination in destinations:
+                signature = (destination.kind, str(destination.address))
+                if signature not in known:
+                    known.add(signature)
+                    added.append(destination)
+            subscription.destinations += tuple(added)
+        return subscription
+
+    def remove(self, key):
+        """Удаляет подписку по ключу."""
+        with self._lock:
+            return self._items.pop(key, None)
+
+    def get(self, key):
+        """Возвращает подписку по ключу или None."""
+        return self._items.get(key)
+
+    def keys(self):
+        """Возвращает снимок ключей подписок."""
+        with self._lock:
+            return list(self._items)
+
+    def merge(self, other):
+        """.
+        Приводит реестр к составу other: добавляет новые подписки,
+        обновляет чаты существующих и удаляет исчезнувшие. Возвращает
+        число добавленных и удалённых подписок.
+        """
+        self.coalesced = other.coalesced
+        keys = set(other.keys())
+        removed = [key for key in self.keys() if key not in keys]
+        for key in removed:
+            self.remove(key)
+        added = 0
+        for subscription in other:
+            if subscription.key not in self:
+                added += 1
+            self.add(subscription.token, subscription.chat_id,
+                     subscription.timestamp, subscription.locale,
+                     subscription.destinations)
+        return added, len(removed)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+    @classmethod
+    def from_file(cls, path):
+        """.
+        Загружает подписки из JSON-файла со списком объектов. Чат записи
+        с уже встречавшимся токеном и её адресаты становятся
+        дополнительными адресатами первой подписки с этим токеном.
+        """
+        with open(path, encoding='utf-8') as file:
+            entries = json.load(file)
+        if not isinstance(entries, list):
+            raise TypeError(SUBSCRIPTIONS_NOT_LIST.format(type(entries)))
+        registry = cls()
+        for number, entry in enumerate(entries):
+            try:
+                destinations = [parse_destination(destination) for destination
+                                in entry.get('destinations', ())]
+                key = token_key(entry['token'])
+                if key in registry and entry['chat_id']:
+                    registry.extend(key, [parse_destination(entry['chat_id']),
+                                          *destinations])
+                    registry.coalesced += 1
+                else:
+                    registry.add(entry['token'], entry['chat_id'],
+                                 entry.get('timestamp', 0),
+                                 entry.get('locale'), destinations)
+            except (AttributeError, KeyError, TypeError) as error:
+                chat_id = (entry.get('chat_id') if isinstance(entry, dict)
+                           else None)
+                message = INVALID_ENTRY.format(number, chat_id)
+                raise ValueError(message) from error
+        return registry
+
+
+def load_registry(path=None, token=None, chat_id=None):
+    """.
+    Загружает реестр из файла, а при его отсутствии - из пары токенов
+    единственного студента.
+    """
+    if path:
+        return SubscriptionRegistry.from_file(path)
+    registry = SubscriptionRegistry()
+    if token and chat_id:
+        registry.add(token, chat_id)
+    return registry
@@ -0,0 +1,87 @@
+import asyncio
+from http import HTTPStatus
+
+import requests
+
+import utils
+from utils import RecordingBot, mock_get_by_token
+
+
+class FakeAsyncClient:
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def get(self, url, headers=None, params=None, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        response = utils.MockResponseGET(random_timestamp=7,
+                                         http_status=HTTPStatus.OK)
+
+        def mock_json():
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 7
+            }
+
+        response.json = mock_json
+        return response
+
+
+def make_registry(count):
+    import subscriptions
+
+    registry = subscriptions.SubscriptionRegistry()
+    for number in range(count):
+        registry.add(f'token{number}', number + 1)
+    return registry
+
+
+class TestAsyncPollingEngine:
+    def test_poll_all_with_sync_fallback(self, monkeypatch):
+        import async_engine
+
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'token0': 'approved', 'token1': 'rejected'}
+        ))
+        bot = RecordingBot()
+        poller = async_engine.AsyncPollingEngine(make_registry(2), bot)
+        asyncio.run(poller.poll_all())
+        assert sorted(chat for chat, _ in bot.sent) == [1, 2], (
+            'Без асинхронного клиента движок должен использовать '
+            'синхронные функции из homework.py.'
+        )
+
+    def test_concurrency_cap(self):
+        import async_engine
+
+        client = FakeAsyncClient()
+        bot = RecordingBot()
+        registry = make_registry(20)
+        poller = async_engine.AsyncPollingEngine(
+            registry, bot, concurrency=4, client=client
+        )
+        asyncio.run(poller.poll_all())
+        assert len(bot.sent) == 20
+        assert 1 < client.max_active <= 4, (
+            'Запросы должны перекрываться, но не превышать лимит.'
+        )
+        assert all(sub.timestamp == 7 for sub in registry)
+
+    def test_async_client_records_metrics(self):
+        import async_engine
+        import metrics
+
+        requests_before = metrics.API_REQUESTS.value('200')
+        latency_before = metrics.API_LATENCY.count()
+        poller = async_engine.AsyncPollingEngine(
+            make_registry(3), RecordingBot(), client=FakeAsyncClient()
+        )
+        asyncio.run(poller.poll_all())
+        assert metrics.API_REQUESTS.value('200') == requests_before + 3, (
+            'Запросы асинхронного клиента должны учитываться в метриках.'
+        )
+        assert metrics.API_LATENCY.count() == latency_before + 3
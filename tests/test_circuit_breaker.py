@@ -0,0 +1,132 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import utils
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def failing(*args):
+    raise ConnectionError('down')
+
+
+class TestCircuitBreaker:
+    def make(self):
+        import circuit_breaker
+
+        clock = Clock()
+        breaker = circuit_breaker.CircuitBreaker(
+            failure_threshold=2, base_delay=10, max_delay=35, clock=clock)
+        return breaker, clock
+
+    def test_opens_after_threshold_and_backs_off(self):
+        import circuit_breaker
+        import exceptions
+
+        breaker, clock = self.make()
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(failing)
+        assert breaker.state == circuit_breaker.OPEN
+        with pytest.raises(exceptions.CircuitOpenException):
+            breaker.call(failing)
+        assert breaker.retry_after() == 10
+
+        clock.now = 10
+        assert breaker.state == circuit_breaker.HALF_OPEN
+        with pytest.raises(ConnectionError):
+            breaker.call(failing)
+        assert breaker.retry_after() == 20, (
+            'Пауза должна расти экспоненциально после неудачной пробы.'
+        )
+        clock.now = 30
+        with pytest.raises(ConnectionError):
+            breaker.call(failing)
+        assert breaker.retry_after() == 35
+
+    def test_concurrent_failures_trip_once(self):
+        import circuit_breaker
+
+        breaker, _ = self.make()
+        for _ in range(16):
+            breaker.before_call()
+        for _ in range(16):
+            breaker.record_failure()
+        assert breaker.state == circuit_breaker.OPEN
+        assert breaker.trips == 1, (
+            'Сбои запросов, пропущенных до размыкания, не должны снова '
+            'размыкать цепь.'
+        )
+        assert breaker.retry_after() == 10
+        breaker.record_failure(retry_after=30)
+        assert breaker.retry_after() == 30, (
+            'Больший Retry-After должен продлевать паузу.'
+        )
+        breaker.record_failure(retry_after=5)
+        assert breaker.retry_after() == 30
+
+    def test_single_probe_and_recovery(self):
+        import circuit_breaker
+        import exceptions
+
+        breaker, clock = self.make()
+        breaker.record_failure()
+        breaker.record_failure()
+        clock.now = 10
+        breaker.before_call()
+        with pytest.raises(exceptions.CircuitOpenException):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == circuit_breaker.CLOSED
+        assert breaker.call(lambda: 'ok') == 'ok'
+
+    def test_client_errors_do_not_trip(self):
+        import circuit_breaker
+        import exceptions
+
+        breaker, _ = self.make()
+        for _ in range(3):
+            with pytest.raises(exceptions.CodeStatusException):
+                breaker.call(self.raise_unauthorized)
+        assert breaker.state == circuit_breaker.CLOSED
+
+    @staticmethod
+    def raise_unauthorized():
+        import exceptions
+
+        raise exceptions.CodeStatusException('401')
+
+    def test_retry_after_opens_immediately(self, monkeypatch,
+                                           homework_module):
+        import exceptions
+
+        def mock_get(*args, **kwargs):
+            response = utils.MockResponseGET(
+                http_status=HTTPStatus.TOO_MANY_REQUESTS)
+            response.headers = {'Retry-After': '120'}
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        breaker, _ = self.make()
+        with pytest.raises(exceptions.RetryAfterException):
+            breaker.call(homework_module.get_api_answer, 0)
+        assert breaker.retry_after() == 120, (
+            'Предохранитель должен учитывать заголовок Retry-After.'
+        )
+
+    def test_parse_retry_after(self):
+        import circuit_breaker
+
+        assert circuit_breaker.parse_retry_after('30') == 30
+        assert circuit_breaker.parse_retry_after(None) is None
+        assert circuit_breaker.parse_retry_after('garbage') is None
+        assert circuit_breaker.parse_retry_after(
+            'Thu, 01 Jan 1970 00:01:40 GMT', now=lambda: 40) == 60
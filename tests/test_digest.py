@@ -0,0 +1,74 @@
+from utils import RecordingBot
+from test_outbound import FakeTime, make_queue
+
+
+class TestSplitMessage:
+    def test_parts_are_packed_up_to_limit(self):
+        from homework import split_message
+
+        assert split_message(['aaa', 'bb', 'cc', 'd'], limit=6) == [
+            'aaa\nbb', 'cc\nd'
+        ], 'Части должны склеиваться, пока помещаются в лимит.'
+
+    def test_long_part_is_cut(self):
+        from homework import split_message
+
+        chunks = split_message(['a', 'b' * 10], limit=4)
+        assert chunks == ['a', 'bbbb', 'bbbb', 'bb']
+        assert all(len(chunk) <= 4 for chunk in chunks), (
+            'Ни одно сообщение не должно превышать лимит Telegram.'
+        )
+
+
+class TestDigestQueue:
+    def make_digest(self, **kwargs):
+        from digest import DigestQueue
+
+        fake_time = FakeTime()
+        bot = RecordingBot()
+        outbox = make_queue(bot, fake_time, chat_rate=1000, chat_burst=1000)
+        digest = DigestQueue(outbox, clock=fake_time.clock, **kwargs)
+        return digest, bot, fake_time
+
+    def test_burst_becomes_one_message_per_chat(self):
+        digest, bot, fake_time = self.make_digest(window=5)
+        results = []
+        for number in range(3):
+            digest.submit(1, f'hw{number}', results.append)
+        digest.submit(2, 'other', results.append)
+        assert digest.flush(fake_time.now) == 5, (
+            'До конца окна дайджест не должен отправляться.'
+        )
+        fake_time.now = 5
+        assert digest.flush(fake_time.now) is None
+        digest.outbox.start()
+        digest.outbox.stop(5)
+        assert sorted(bot.sent) == [(1, 'hw0\nhw1\nhw2'), (2, 'other')]
+        assert results == [True] * 4, (
+            'Каждое уведомление должно узнать об отправке дайджеста.'
+        )
+        stats = digest.stats()
+        assert stats['digest_notifications'] == 4
+        assert stats['digest_messages'] == 2
+
+    def test_long_digest_is_split_and_sent_at_once(self):
+        digest, bot, _ = self.make_digest(window=60, max_length=10)
+        results = []
+        digest.submit(1, 'a' * 6, results.append)
+        digest.submit(1, 'b' * 6, results.append)
+        digest.start()
+        digest.outbox.join()
+        assert bot.sent == [(1, 'a' * 6), (1, 'b' * 6)], (
+            'Переросший лимит дайджест должен уходить сразу и по частям.'
+        )
+        assert results == [True, True]
+        digest.stop(5)
+
+    def test_stop_flushes_pending(self):
+        digest, bot, _ = self.make_digest(window=60)
+        digest.start()
+        digest.submit(1, 'late')
+        digest.stop(5)
+        assert bot.sent == [(1, 'late')], (
+            'При остановке накопленные уведомления должны быть отправлены.'
+        )
@@ -0,0 +1,203 @@
+import json
+import threading
+
+import pytest
+import requests
+
+from utils import RecordingBot, mock_get_by_token
+
+
+class TestSubscriptions:
+    def test_registry_from_file(self, tmp_path):
+        import subscriptions
+
+        path = tmp_path / 'subs.json'
+        path.write_text(json.dumps([
+            {'token': 'secret', 'chat_id': 1},
+            {'token': 'other', 'chat_id': 2, 'timestamp': 50},
+            {'token': 'secret', 'chat_id': 3, 'destinations': [1, 4]},
+        ]))
+        registry = subscriptions.SubscriptionRegistry.from_file(path)
+        assert len(registry) == 2, (
+            'Подписки с одинаковым токеном должны объединяться.'
+        )
+        subscription = registry.get(subscriptions.token_key('secret'))
+        assert subscription.chat_id == 1
+        assert [destination.address for destination
+                in subscription.destinations] == [3, 4], (
+            'Чат повторной записи с тем же токеном должен становиться '
+            'дополнительным адресатом, а не заменять основной чат.'
+        )
+        assert 'secret' not in repr(subscription), (
+            'Токен не должен попадать в repr подписки.'
+        )
+
+    def test_invalid_entry_hides_token(self, tmp_path):
+        import subscriptions
+
+        path = tmp_path / 'subs.json'
+        path.write_text(json.dumps([
+            {'token': 'secret', 'chat_id': 1},
+            {'token': 'leaked', 'chat': 2},
+        ]))
+        with pytest.raises(ValueError) as error:
+            subscriptions.SubscriptionRegistry.from_file(path)
+        assert 'leaked' not in str(error.value), (
+            'Токен не должен попадать в текст ошибки подписки.'
+        )
+        assert '№1' in str(error.value)
+        assert isinstance(error.value.__cause__, KeyError)
+
+    def test_load_registry_from_env_pair(self):
+        import subscriptions
+
+        assert len(subscriptions.load_registry(None, 'token', '1')) == 1
+        assert len(subscriptions.load_registry(None, None, '1')) == 0
+
+
+class TestPollingEngine:
+    def test_poll_sends_to_own_chat(self, monkeypatch):
+        import engine
+        import subscriptions
+
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'a': 'approved', 'b': 'rejected'}
+        ))
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('a', 1)
+        registry.add('b', 2)
+        bot = RecordingBot()
+        poller = engine.PollingEngine(registry, bot, max_workers=2)
+        for subscription in registry:
+            poller.poll(subscription)
+        assert sorted(chat for chat, _ in bot.sent) == [1, 2]
+        assert all(sub.timestamp == 100 for sub in registry), (
+            'После отправки сообщения курсор подписки должен сдвигаться.'
+        )
+
+    def test_slow_tenant_does_not_block_others(self, monkeypatch):
+        import engine
+        import subscriptions
+
+        slow_gate = threading.Event()
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'slow': 'approved', 'fast': 'reviewing'}, {'slow': slow_gate}
+        ))
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('slow', 1)
+        registry.add('fast', 2)
+        bot = RecordingBot()
+        poller = engine.PollingEngine(registry, bot, interval=60,
+                                      max_workers=2)
+        worker = threading.Thread(target=poller.run)
+        worker.start()
+        try:
+            for _ in range(100):
+                if bot.sent:
+                    break
+                threading.Event().wait(0.02)
+            assert [chat for chat, _ in bot.sent] == [2], (
+                'Медленная подписка не должна задерживать остальные.'
+            )
+        finally:
+            slow_gate.set()
+            poller.stop()
+            worker.join(5)
+        assert sorted(chat for chat, _ in bot.sent) == [1, 2]
+
+    def test_sent_status_is_not_repeated(self, monkeypatch):
+        import engine
+        import subscriptions
+
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'a': 'approved'}
+        ))
+        registry = subscriptions.SubscriptionRegistry()
+        subscription = registry.add('a', 1)
+        bot = RecordingBot()
+        poller = engine.PollingEngine(registry, bot)
+        poller.poll(subscription)
+        poller.poll(subscription)
+        assert len(bot.sent) == 1, (
+            'Уже отправленный статус не должен отправляться повторно.'
+        )
+        assert poller.store.get_cursor(subscription.key) == 100
+
+
+class TestPrepareUpdate:
+    def test_all_transitions_in_one_message(self, homework_module):
+        response = {
+            'homeworks': [
+                {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': 1
+        }
+        changes, message = homework_module.prepare_update(
+            response, {'1': 'approved', '2': 'reviewing'}
+        )
+        assert changes == {'2': 'approved', '3': 'reviewing'}, (
+            'Должны отправляться только реальные смены статусов всех работ.'
+        )
+        assert message.count('Изменился статус') == 2
+        assert message.index('"hw2"') < message.index('"hw3"')
+
+    def test_no_transitions(self, homework_module):
+        response = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'approved'}],
+            'current_date': 1
+        }
+        assert homework_module.prepare_update(
+            response, {'1': 'approved'}) == ({}, None)
+
+    def test_first_run_seeds_statuses(self, homework_module):
+        response = {
+            'homeworks': [
+                {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'rejected'},
+            ],
+            'current_date': 1
+        }
+        changes, message = homework_module.prepare_update(response, {})
+        assert changes == {'1': 'rejected', '2': 'approved',
+                           '3': 'reviewing'}, (
+            'При пустом состоянии должны запоминаться статусы всех работ.'
+        )
+        assert message.count('Изменился статус') == 1 and '"hw3"' in message, (
+            'При пустом состоянии уведомление должно быть только о последней '
+            'работе, а не обо всей истории.'
+        )
+
+    def test_invalid_homework_is_skipped(self, homework_module):
+        response = {
+            'homeworks': [
+                {'id': 2, 'homework_name': 'hw2', 'status': 'archived'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': 1
+        }
+        changes, message = homework_module.prepare_update(
+            response, {'1': 'reviewing'})
+        assert changes == {'1': 'approved'}, (
+            'Работа с некорректным статусом не должна мешать уведомлениям '
+            'об остальных.'
+        )
+        assert '"hw1"' in message
+
+
+class TestSendToChat:
+    def test_long_message_is_split(self, homework_module):
+        from telegram.constants import MAX_MESSAGE_LENGTH
+
+        bot = RecordingBot()
+        parts = ['x' * 3000, 'y' * 3000, 'z' * 10]
+        assert homework_module.send_to_chat(
+            bot, 1, homework_module.UPDATE_SEPARATOR.join(parts))
+        assert [text for _, text in bot.sent] == [
+            parts[0], homework_module.UPDATE_SEPARATOR.join(parts[1:])], (
+            'Слишком длинное сообщение должно отправляться частями по строкам.'
+        )
+        assert all(len(text) <= MAX_MESSAGE_LENGTH for _, text in bot.sent)
@@ -0,0 +1,126 @@
+import pytest
+import requests
+
+import utils
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    def test_refill(self):
+        from rate_limit import TokenBucket
+
+        clock = Clock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+        assert bucket.try_acquire() and bucket.try_acquire()
+        assert not bucket.try_acquire()
+        assert bucket.wait_time() == 1
+        clock.now += 1
+        assert bucket.try_acquire()
+
+
+class TestErrorNotifier:
+    def make(self, capacity=10):
+        from error_notifier import ErrorNotifier
+        from rate_limit import TokenBucket
+
+        clock = Clock()
+        sent = []
+
+        def send(text):
+            sent.append(text)
+            return True
+
+        notifier = ErrorNotifier(
+            'Сбой: {}', window=60,
+            bucket=TokenBucket(rate=0, capacity=capacity, clock=clock),
+            clock=clock)
+        return notifier, clock, sent, send
+
+    def test_repeats_are_summarized(self):
+        notifier, clock, sent, send = self.make()
+        error = ConnectionError('down')
+        for _ in range(5):
+            assert notifier.notify(1, error, send)
+            clock.now += 10
+        assert sent == ['Сбой: down'], (
+            'Повторы одной ошибки не должны отправляться сразу.'
+        )
+        clock.now += 20
+        notifier.notify(1, error, send)
+        assert len(sent) == 2
+        assert 'повторов - 6' in sent[1]
+
+    def test_connection_errors_share_signature(self, homework_module,
+                                               monkeypatch):
+        notifier, _, sent, send = self.make()
+        monkeypatch.setattr(homework_module, 'ENDPOINT', 'http://127.0.0.1:9/')
+        monkeypatch.setattr(homework_module, 'REQUEST_TIMEOUT', 1)
+        for _ in range(3):
+            with pytest.raises(ConnectionError) as error:
+                homework_module.send_api_request({}, {})
+            assert isinstance(error.value.__context__,
+                              requests.ConnectionError)
+            notifier.notify(1, error.value, send)
+        assert len(sent) == 1, (
+            'Одинаковые ошибки соединения не должны отправляться повторно '
+            'из-за адресов объектов в тексте ошибки.'
+        )
+
+    def test_new_error_and_resolve(self):
+        notifier, _, sent, send = self.make()
+        notifier.notify(1, ConnectionError('down'), send)
+        notifier.notify(1, ValueError('bad'), send)
+        notifier.notify(2, ValueError('bad'), send)
+        notifier.resolve(1)
+        notifier.notify(1, ValueError('bad'), send)
+        assert len(sent) == 4
+
+    def test_rate_limited(self):
+        notifier, _, sent, send = self.make(capacity=1)
+        notifier.notify(1, ValueError('a'), send)
+        assert notifier.notify(2, ValueError('a'), send)
+        assert len(sent) == 1
+        assert notifier.suppressed == 1
+
+    def test_failed_send_is_reported(self):
+        notifier, _, _, _ = self.make()
+        assert not notifier.notify(1, ValueError('a'), lambda text: False)
+
+
+class TestMainErrorDeduplication:
+    def test_main_sends_repeated_error_once(self, monkeypatch,
+                                            homework_module):
+        import time
+
+        def mock_get(*args, **kwargs):
+            return utils.MockResponseGET(http_status=401)
+
+        cycles = []
+
+        def sleep(secs):
+            cycles.append(secs)
+            if len(cycles) == 2:
+                raise utils.BreakInfiniteLoop('break')
+
+        sent = []
+        monkeypatch.setattr(requests, 'get', mock_get)
+        monkeypatch.setattr(time, 'sleep', sleep)
+        monkeypatch.setattr(homework_module.telegram, 'Bot',
+                            lambda **kwargs: utils.MockTelegramBot())
+        monkeypatch.setattr(homework_module, 'send_message',
+                            lambda bot, text: sent.append(text) or True)
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abc')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+        assert len(sent) == 1, (
+            'Одинаковая ошибка не должна отправляться в каждом цикле.'
+        )
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+
+RESPONSE = {
+    'current_date': 100,
+    'homeworks': [
+        {'id': 2, 'homework_name': 'hw_2', 'status': 'reviewing',
+         'reviewer_comment': 'Комментарий', 'lesson_name': 'Спринт ' * 10},
+        {'id': 1, 'homework_name': 'hw_1', 'status': 'approved',
+         'reviewer_comment': '', 'lesson_name': 'Спринт'},
+    ],
+}
+
+
+class TestFastJson:
+    @pytest.mark.parametrize('backend', ['stdlib', 'orjson', 'msgspec'])
+    def test_decode_keeps_needed_fields(self, monkeypatch, backend):
+        import fast_json
+
+        if backend != 'stdlib' and getattr(fast_json, backend) is None:
+            pytest.skip(f'{backend} не установлен')
+        monkeypatch.setattr(fast_json, 'BACKEND', backend)
+        response = fast_json.decode_statuses(json.dumps(RESPONSE).encode())
+        assert response == {
+            'current_date': 100,
+            'homeworks': [
+                {'id': 2, 'homework_name': 'hw_2', 'status': 'reviewing',
+                 'reviewer_comment': 'Комментарий'},
+                {'id': 1, 'homework_name': 'hw_1', 'status': 'approved',
+                 'reviewer_comment': ''},
+            ],
+        }, 'В работах должны остаться только поля записи Homework.'
+        error = fast_json.decode_statuses(b'{"code": "x", "homeworks": 1}')
+        assert error == {'code': 'x', 'homeworks': 1}, (
+            'Ответ, не подходящий под схему, должен разбираться целиком.'
+        )
+
+    def test_objects_without_body_use_own_json(self):
+        import fast_json
+
+        import utils
+
+        response = utils.MockResponseGET(random_timestamp=5)
+        assert fast_json.response_json(response) == {
+            'homeworks': [], 'current_date': 5
+        }
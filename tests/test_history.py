@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def journal(tmp_path):
+    import history
+
+    clock = FakeClock(1000)
+    statuses = history.StatusHistory(tmp_path / 'history.sqlite3',
+                                     batch_size=100, flush_interval=60,
+                                     clock=clock)
+    yield statuses, clock
+    statuses.close()
+
+
+class TestStatusHistory:
+    def test_appends_are_batched(self, journal, tmp_path):
+        statuses, _ = journal
+        statuses.append('key', {'hw': 'reviewing'}, 100)
+        connection = sqlite3.connect(tmp_path / 'history.sqlite3')
+        count = 'SELECT COUNT(*) FROM transitions'
+        assert connection.execute(count).fetchone() == (0,), (
+            'Запись в журнал должна откладываться до сохранения пачки.'
+        )
+        assert statuses.flush() == 1
+        assert connection.execute(count).fetchone() == (1,)
+        connection.close()
+
+    def test_last_transitions(self, journal):
+        from history import Transition
+
+        statuses, _ = journal
+        statuses.append('key', {'1': 'reviewing'}, 100, {'1': 'hw1'})
+        statuses.append('key', {'1': 'rejected', '2': 'reviewing'}, 200,
+                        {'1': 'hw1', '2': 'hw2'})
+        statuses.append('other', {'1': 'approved'}, 300)
+        assert statuses.last_transitions('key', limit=2) == [
+            Transition('key', '2', 'reviewing', 200, 'hw2'),
+            Transition('key', '1', 'rejected', 200, 'hw1'),
+        ]
+        assert [item.status for item in statuses.last_transitions(
+            'key', name='hw1')] == ['rejected', 'reviewing'], (
+            'Смены статусов должны возвращаться от новых к старым.'
+        )
+
+    def test_time_in_status(self, journal):
+        statuses, clock = journal
+        statuses.append('key', {'hw': 'reviewing'}, 100)
+        statuses.append('key', {'hw': 'rejected'}, 400)
+        statuses.append('key', {'hw': 'reviewing'}, 500)
+        clock.now = 600
+        assert statuses.time_in_status('key', 'hw') == 400, (
+            'Время на проверке должно суммироваться по всем заходам, '
+            'включая текущий.'
+        )
+        assert statuses.time_in_status('key', 'hw', 'rejected') == 100
+        assert statuses.time_in_status('key', 'missing') == 0
+
+    def test_background_flush_and_close(self, tmp_path):
+        import history
+
+        path = tmp_path / 'history.sqlite3'
+        statuses = history.open_history(path, batch_size=1)
+        statuses.append('key', {'hw': 'approved'}, 100)
+        statuses.close()
+        reopened = history.StatusHistory(path)
+        assert len(reopened.last_transitions('key')) == 1, (
+            'Журнал должен сохраняться между запусками.'
+        )
+        reopened.close()
+        assert history.open_history(None) is None
+
+
+class TestHistoryHooks:
+    def test_engine_commit_and_history_command(self, journal):
+        import engine
+        import state_store
+        import webhook
+        from subscriptions import SubscriptionRegistry
+        from utils import RecordingBot
+
+        statuses, clock = journal
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 42)
+        store = state_store.MemoryStateStore()
+        poller = engine.PollingEngine(registry, RecordingBot(), store,
+                                      history=statuses)
+        poller.commit(subscription, 0, {'7': 'reviewing'}, {'7': 'hw_7'})
+        assert statuses.last_transitions(subscription.key) == [], (
+            'Статусы, запомненные при первом опросе, не должны попадать '
+            'в журнал.'
+        )
+        store.record(subscription.key, 0, {'7': 'rejected'})
+        clock.now = 100
+        poller.commit(subscription, 0, {'7': 'reviewing'}, {'7': 'hw_7'})
+        clock.now = 3700
+        poller.commit(subscription, 0, {'7': 'approved'}, {'7': 'hw_7'})
+        assert [transition.changed_at for transition in
+                statuses.last_transitions(subscription.key)] == [3700, 100], (
+            'Время смены статуса должно браться по часам, а не из курсора.'
+        )
+        reply = webhook.CommandResponder(registry, store,
+                                         history=statuses).answer(
+            42, '/history')
+        assert 'работа hw_7: Работа проверена' in reply, (
+            'Команда /history должна показывать смены статусов из журнала '
+            'с названиями работ.'
+        )
+        assert 'Работа hw_7 на проверке: 1:00:00' in reply
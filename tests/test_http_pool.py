@@ -0,0 +1,72 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestPooledSession:
+    def test_connection_is_reused(self, local_server):
+        import http_pool
+
+        pool = http_pool.PooledSession()
+        for _ in range(3):
+            pool.get(local_server).json()
+        assert pool.stats() == {
+            'requests': 3, 'hits': 2, 'misses': 1, 'evictions': 0
+        }, 'Повторные запросы должны использовать открытое соединение.'
+        pool.close()
+
+    def test_idle_session_is_evicted(self, local_server):
+        import http_pool
+
+        now = [0]
+        pool = http_pool.PooledSession(idle_timeout=10,
+                                       clock=lambda: now[0])
+        pool.get(local_server)
+        now[0] = 100
+        pool.get(local_server)
+        stats = pool.stats()
+        assert stats['evictions'] == 1
+        assert stats['misses'] == 2
+        assert stats['requests'] == 2
+        pool.close()
+
+    def test_get_api_answer_uses_enabled_pool(self, local_server,
+                                              monkeypatch, homework_module):
+        import http_pool
+
+        monkeypatch.setattr(homework_module, 'ENDPOINT', local_server)
+        pool = http_pool.enable()
+        try:
+            homework_module.get_api_answer(0)
+            homework_module.get_api_answer(0)
+            assert pool.stats()['hits'] == 1
+        finally:
+            http_pool.disable()
+        assert http_pool.active() is None
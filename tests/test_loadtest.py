@@ -0,0 +1,39 @@
+class TestFakePracticum:
+    def test_status_changes_and_errors(self):
+        import loadtest
+
+        practicum = loadtest.FakePracticum(history=3, change_every=2)
+        statuses = []
+        for _ in range(4):
+            code, _, data = practicum.reply('token', 0)
+            assert code == 200
+            assert len(data['homeworks']) == 3
+            statuses.append(data['homeworks'][0]['status'])
+        assert statuses == ['reviewing', 'reviewing', 'rejected',
+                            'rejected'], (
+            'Статус последней работы должен меняться каждые '
+            'change_every запросов.'
+        )
+        throttling = loadtest.FakePracticum(throttle_rate=1)
+        code, headers, _ = throttling.reply('token', 0)
+        assert code == 429 and 'Retry-After' in headers
+
+
+class TestLoadTest:
+    def test_engine_polls_fake_servers(self):
+        import homework
+        import http_pool
+        import loadtest
+
+        endpoint = homework.ENDPOINT
+        report = loadtest.run(tokens=20, duration=1, interval=0.2,
+                              workers=4)
+        assert homework.ENDPOINT == endpoint, (
+            'После нагрузочного теста адрес API должен восстанавливаться.'
+        )
+        assert not http_pool.active()
+        assert report['api_requests'] >= 20, (
+            'Каждая подписка должна быть опрошена хотя бы один раз.'
+        )
+        assert report['messages_sent'] >= 20
+        assert report['latency_p99_ms'] >= report['latency_p50_ms'] > 0
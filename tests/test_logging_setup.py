@@ -0,0 +1,137 @@
+import gzip
+import logging
+
+
+def make_record(message):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message,
+                             None, None)
+
+
+class TestBatchingRotatingFileHandler:
+    def test_writes_are_batched(self, tmp_path):
+        import logging_setup
+
+        path = tmp_path / 'bot.log'
+        handler = logging_setup.BatchingRotatingFileHandler(
+            path, batch_size=3, interval=0)
+        handler.emit(make_record('one'))
+        handler.emit(make_record('two'))
+        assert path.read_text() == '', (
+            'Записи должны сбрасываться на диск пачкой.'
+        )
+        handler.emit(make_record('three'))
+        assert path.read_text().splitlines() == ['one', 'two', 'three']
+        handler.emit(make_record('four'))
+        handler.close()
+        assert path.read_text().splitlines()[-1] == 'four'
+
+    def test_time_rotation_is_compressed(self, tmp_path):
+        import logging_setup
+
+        now = [0]
+        path = tmp_path / 'bot.log'
+        handler = logging_setup.BatchingRotatingFileHandler(
+            path, interval=60, batch_size=1, clock=lambda: now[0])
+        handler.emit(make_record('old'))
+        now[0] = 61
+        handler.emit(make_record('new'))
+        handler.close()
+        archive = tmp_path / 'bot.log.1.gz'
+        assert archive.exists(), 'Ротированный лог должен сжиматься.'
+        assert gzip.decompress(archive.read_bytes()).decode() == 'old\n'
+        assert path.read_text() == 'new\n'
+
+    def test_size_rotation_keeps_backups(self, tmp_path):
+        import logging_setup
+
+        path = tmp_path / 'bot.log'
+        handler = logging_setup.BatchingRotatingFileHandler(
+            path, max_bytes=10, backup_count=2, interval=0, batch_size=1)
+        for number in range(5):
+            handler.emit(make_record(f'record {number}'))
+        handler.close()
+        names = sorted(item.name for item in tmp_path.iterdir())
+        assert names == ['bot.log', 'bot.log.1.gz', 'bot.log.2.gz']
+
+
+class TestQueueHandlers:
+    def test_records_reach_file_through_queue(self, tmp_path):
+        import logging_setup
+
+        path = tmp_path / 'bot.log'
+        handler, = logging_setup.queue_handlers(path, stream=False)
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        logger = logging.getLogger('test_queue_handlers')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            logger.warning('queued %s', 'message')
+        finally:
+            logger.removeHandler(handler)
+            handler.listener.stop()
+        assert path.read_text() == 'WARNING queued message\n', (
+            'Запись должна форматироваться один раз и попадать в файл.'
+        )
+
+
+class TestStructuredLogging:
+    def test_json_records_have_context_and_hide_token(self, tmp_path):
+        import json
+
+        import logging_setup
+
+        path = tmp_path / 'bot.log'
+        handler, = logging_setup.queue_handlers(path, stream=False,
+                                                log_format='json')
+        logger = logging.getLogger('test_json_records')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            with logging_setup.log_context(tenant='abc', request_id='1-2'):
+                logger.error('headers %s', {'Authorization': 'OAuth secret'},
+                             extra={'status_code': 500, 'latency': 0.5})
+        finally:
+            logger.removeHandler(handler)
+            handler.listener.stop()
+        record = json.loads(path.read_text())
+        assert record['message'] == "headers {'Authorization': 'OAuth ***'}", (
+            'Токен не должен попадать в лог.'
+        )
+        assert record['tenant'] == 'abc'
+        assert record['request_id'] == '1-2'
+        assert record['status_code'] == 500
+        assert record['latency'] == 0.5
+        assert record['level'] == 'ERROR'
+
+    def test_context_is_reset_after_block(self):
+        import logging_setup
+
+        token = logging_setup.bind(tenant='outer')
+        try:
+            with logging_setup.log_context(tenant='inner'):
+                pass
+            record = make_record('message')
+            logging_setup.ContextFilter().filter(record)
+        finally:
+            logging_setup._context.reset(token)
+        assert record.tenant == 'outer', (
+            'Контекст логов не должен выходить за пределы блока with.'
+        )
+
+    def test_redact_hides_bot_token_in_url(self):
+        import logging_setup
+
+        url = ('https://api.telegram.org/bot123456789:'
+               'AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw/sendMessage')
+        assert logging_setup.redact(url) == (
+            'https://api.telegram.org/bot***/sendMessage'), (
+            'Токен бота в адресе Bot API не должен попадать в лог.'
+        )
+
+    def test_mask_headers_hides_token(self):
+        import homework
+
+        masked = homework.mask_headers({'Authorization': 'OAuth secret'})
+        assert 'secret' not in str(masked), (
+            'Заголовки в сообщениях об ошибках должны скрывать токен.'
+        )
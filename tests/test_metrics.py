@@ -0,0 +1,67 @@
+import threading
+from urllib.request import urlopen
+
+import pytest
+import requests
+
+import utils
+
+
+class TestMetrics:
+    def test_exposition_format(self):
+        import metrics
+
+        registry = metrics.Registry()
+        counter = metrics.Counter('hits_total', 'Hits', ['code'],
+                                  registry=registry)
+        histogram = metrics.Histogram('latency_seconds', 'Latency',
+                                      registry=registry, buckets=(1, 5))
+        counter.inc('200')
+        counter.inc('200')
+        histogram.observe(0.5)
+        histogram.observe(3)
+        text = registry.expose()
+        assert '# TYPE hits_total counter' in text
+        assert 'hits_total{code="200"} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 1' in text
+        assert 'latency_seconds_bucket{le="5"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+        assert 'latency_seconds_sum 3.5' in text
+
+    def test_hot_paths_are_instrumented(self, monkeypatch, homework_module):
+        import metrics
+
+        def mock_get(*args, **kwargs):
+            return utils.MockResponseGET(random_timestamp=1)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        requests_before = metrics.API_REQUESTS.value('200')
+        failures_before = metrics.FAILURES.value('parse_status')
+        latency_before = metrics.API_LATENCY.count()
+        homework_module.get_api_answer(0)
+        with pytest.raises(Exception):
+            homework_module.parse_status({'status': 'approved'})
+        assert metrics.API_REQUESTS.value('200') == requests_before + 1
+        assert metrics.API_LATENCY.count() == latency_before + 1
+        assert metrics.FAILURES.value('parse_status') == failures_before + 1
+
+    def test_serve_is_disabled_without_port(self):
+        import metrics
+
+        assert metrics.serve(port=0) is None
+
+    def test_metrics_endpoint(self):
+        import metrics
+
+        metrics.register_stats('test_stats', 'Test', lambda: {'depth': 3})
+        server = metrics.ThreadingHTTPServer(('127.0.0.1', 0),
+                                             metrics.MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            body = urlopen(url, timeout=5).read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'test_stats{name="depth"} 3' in body
+        assert 'homework_api_requests_total' in body
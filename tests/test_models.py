@@ -0,0 +1,54 @@
+import pytest
+
+
+class TestHomework:
+    def test_from_api_builds_record(self):
+        from models import Homework, HomeworkStatus
+
+        homework = Homework.from_api({
+            'id': 7, 'homework_name': 'hw_7', 'status': 'approved',
+            'date_updated': '2020-02-13T14:40:57Z', 'lesson_name': 'Спринт'
+        })
+        assert homework.status is HomeworkStatus.APPROVED, (
+            'Статус работы должен быть членом перечисления HomeworkStatus.'
+        )
+        assert homework.status == 'approved'
+        assert homework.key == '7'
+        assert homework.date_updated == '2020-02-13T14:40:57Z'
+        assert Homework.from_api(homework) is homework
+        assert not hasattr(homework, '__dict__'), (
+            'Запись о работе не должна хранить словарь атрибутов.'
+        )
+
+    def test_key_falls_back_to_name(self):
+        from models import Homework
+
+        homework = Homework.from_api({'homework_name': 'hw',
+                                      'status': 'reviewing'})
+        assert homework.key == 'hw'
+
+    @pytest.mark.parametrize('data, error', [
+        ({'status': 'approved'}, KeyError),
+        ({'homework_name': 'hw'}, KeyError),
+        ({'homework_name': 'hw', 'status': 'unknown'}, ValueError),
+        (['hw'], TypeError),
+    ])
+    def test_invalid_homework(self, data, error):
+        from models import Homework
+
+        with pytest.raises(error):
+            Homework.from_api(data)
+
+    def test_prepare_update_compares_statuses(self):
+        import homework as homework_module
+
+        response = {'homeworks': [
+            {'id': 2, 'homework_name': 'hw_2', 'status': 'reviewing'},
+            {'id': 1, 'homework_name': 'hw_1', 'status': 'approved'},
+        ]}
+        changes, message = homework_module.prepare_update(
+            response, {'1': 'approved'})
+        assert changes == {'2': 'reviewing'}, (
+            'Отправленный ранее статус не должен отправляться повторно.'
+        )
+        assert message.startswith('Изменился статус проверки работы "hw_2"')
@@ -0,0 +1,98 @@
+import threading
+
+import requests
+import telegram
+
+from utils import RecordingBot, mock_get_by_token
+
+
+class FlakyBot(RecordingBot):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise telegram.error.RetryAfter(3)
+        super().send_message(chat_id, text)
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, secs):
+        with self.lock:
+            self.now += secs
+
+
+def make_queue(bot, fake_time, **kwargs):
+    from outbound import OutboundQueue
+
+    return OutboundQueue(bot, workers=1, clock=fake_time.clock,
+                         sleep=fake_time.sleep, **kwargs)
+
+
+class TestOutboundQueue:
+    def test_retry_after_is_honoured(self):
+        fake_time = FakeTime()
+        bot = FlakyBot(failures=2)
+        outbox = make_queue(bot, fake_time)
+        results = []
+        outbox.start()
+        outbox.submit(1, 'text', results.append)
+        outbox.stop(5)
+        assert bot.sent == [(1, 'text')]
+        assert results == [True]
+        assert fake_time.now >= 6, (
+            'Перед повтором нужно выждать время из RetryAfter.'
+        )
+        assert outbox.stats()['retried'] == 2
+
+    def test_per_chat_rate_limit(self):
+        fake_time = FakeTime()
+        bot = RecordingBot()
+        outbox = make_queue(bot, fake_time, chat_rate=1, chat_burst=1)
+        for number in range(3):
+            outbox.submit(1, str(number))
+        outbox.start()
+        outbox.stop(5)
+        assert len(bot.sent) == 3
+        assert fake_time.now == 2, (
+            'Сообщения в один чат должны отправляться не чаще лимита.'
+        )
+
+    def test_full_queue_drops(self):
+        outbox = make_queue(RecordingBot(), FakeTime(), maxsize=1)
+        assert outbox.submit(1, 'a')
+        assert not outbox.submit(1, 'b')
+        stats = outbox.stats()
+        assert stats['dropped'] == 1
+        assert stats['depth'] == 1
+
+    def test_engine_commits_after_delivery(self, monkeypatch):
+        import engine
+        import subscriptions
+
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'a': 'approved'}
+        ))
+        registry = subscriptions.SubscriptionRegistry()
+        subscription = registry.add('a', 1)
+        bot = RecordingBot()
+        outbox = make_queue(bot, FakeTime())
+        poller = engine.PollingEngine(registry, bot, outbox=outbox)
+        assert poller.poll(subscription)
+        assert subscription.timestamp == 0, (
+            'Курсор сдвигается только после доставки сообщения.'
+        )
+        assert not poller.poll(subscription)
+        outbox.start()
+        outbox.stop(5)
+        assert subscription.timestamp == 100
+        assert len(bot.sent) == 1
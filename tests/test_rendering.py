@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+
+class TestMessageRenderer:
+    def test_builtin_russian_matches_parse_status(self, homework_module):
+        import rendering
+
+        renderer = rendering.MessageRenderer()
+        for status in homework_module.HOMEWORK_VERDICTS:
+            homework = {'homework_name': 'hw', 'status': status}
+            assert renderer.render(homework) == (
+                homework_module.parse_status(homework)
+            ), 'Русский шаблон должен совпадать с parse_status.'
+
+    def test_locale_and_template_cache(self):
+        import rendering
+
+        renderer = rendering.MessageRenderer()
+        homework = {'homework_name': 'hw', 'status': 'approved'}
+        assert renderer.render(homework, 'en-GB') == (
+            'The review status of "hw" has changed. '
+            'The work is reviewed: the reviewer liked it. Hooray!'
+        )
+        assert renderer.template('approved', 'en') is renderer.template(
+            'approved', 'en-US'), (
+            'Шаблон должен компилироваться один раз на локаль и статус.'
+        )
+        assert renderer.locale('de') == 'ru', (
+            'Неизвестная локаль должна заменяться локалью по умолчанию.'
+        )
+        render = renderer.for_locale('en')
+        assert render is renderer.for_locale('en')
+        assert render(homework).startswith('The review status')
+
+    def test_template_fields(self):
+        import rendering
+
+        renderer = rendering.MessageRenderer({'ru': {
+            'template': '{name} [{status}]: {verdict} {comment}',
+            'verdicts': {'rejected': 'Исправить {всё}'},
+        }})
+        assert renderer.render({
+            'homework_name': 'hw', 'status': 'rejected',
+            'reviewer_comment': 'Нет тестов',
+        }) == 'hw [rejected]: Исправить {всё} Нет тестов'
+        with pytest.raises(ValueError):
+            renderer.render({'homework_name': 'hw', 'status': 'approved'})
+
+
+class TestCatalog:
+    def test_new_status_without_code_changes(self, tmp_path, monkeypatch,
+                                             homework_module):
+        import models
+        import rendering
+        from models import Homework, HomeworkStatus
+
+        monkeypatch.setattr(models, 'EXTRA_STATUSES', set())
+        path = tmp_path / 'messages.json'
+        path.write_text(json.dumps({
+            'ru': {'verdicts': {'on_hold': 'Проверка отложена.'}},
+            'en': {'template': '{name}: {verdict}',
+                   'verdicts': {'on_hold': 'On hold.'}},
+        }), encoding='utf-8')
+        renderer = rendering.MessageRenderer(rendering.load_catalog(path))
+        homework = Homework.from_api({'homework_name': 'hw',
+                                      'status': 'on_hold'})
+        assert homework.status == 'on_hold' and not isinstance(
+            homework.status, HomeworkStatus), (
+            'Статус из каталога должен приниматься обычной строкой, '
+            'не меняя перечисление HomeworkStatus.'
+        )
+        assert [status.value for status in HomeworkStatus] == [
+            'approved', 'reviewing', 'rejected']
+        assert renderer.render(homework, 'en') == 'hw: On hold.'
+        assert renderer.render(homework).endswith('Проверка отложена.')
+        assert renderer.render(
+            {'homework_name': 'hw', 'status': 'approved'}, 'en'
+        ) == 'hw: The work is reviewed: the reviewer liked it. Hooray!'
+        assert 'on_hold' not in rendering.BUILTIN_CATALOG['ru']['verdicts'], (
+            'Загрузка каталога не должна менять встроенные сообщения.'
+        )
+        monkeypatch.setattr(rendering, '_renderer', renderer)
+        assert homework_module.parse_status(homework).endswith(
+            'Проверка отложена.'), (
+            'parse_status должна брать вердикт нового статуса из каталога.'
+        )
+
+    def test_invalid_catalog(self, tmp_path):
+        import rendering
+
+        path = tmp_path / 'messages.json'
+        path.write_text(json.dumps({'ru': ['не объект']}))
+        with pytest.raises(ValueError):
+            rendering.load_catalog(path)
+
+
+class TestSubscriberLocale:
+    def test_engine_uses_subscription_locale(self, monkeypatch, tmp_path):
+        import requests
+
+        import engine
+        import subscriptions
+        from utils import RecordingBot, mock_get_by_token
+
+        path = tmp_path / 'subs.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'locale': 'en'},
+            {'token': 'b', 'chat_id': 2},
+        ]))
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'a': 'approved', 'b': 'approved'}
+        ))
+        registry = subscriptions.SubscriptionRegistry.from_file(path)
+        bot = RecordingBot()
+        poller = engine.PollingEngine(registry, bot)
+        for subscription in registry:
+            poller.poll(subscription)
+        messages = dict(bot.sent)
+        assert messages[1].startswith('The review status of "hw_a"'), (
+            'Уведомление должно собираться на языке подписки.'
+        )
+        assert messages[2].startswith('Изменился статус проверки работы')
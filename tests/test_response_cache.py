@@ -0,0 +1,139 @@
+import json
+
+import requests
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(data).encode() if data else b''
+        self._data = data
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeServer:
+    def __init__(self, data, etag=None):
+        self.data = data
+        self.etag = etag
+        self.seen_headers = []
+
+    def __call__(self, url, headers=None, params=None, **kwargs):
+        self.seen_headers.append(headers)
+        if self.etag and headers.get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        response_headers = {'ETag': self.etag} if self.etag else {}
+        return FakeResponse(200, self.data, response_headers)
+
+
+DATA = {
+    'homeworks': [{'id': 1, 'homework_name': 'hw', 'status': 'approved'}],
+    'current_date': 10
+}
+HEADERS = {'Authorization': 'OAuth token'}
+
+
+class TestResponseCache:
+    def test_etag_revalidation(self, monkeypatch):
+        import response_cache
+
+        server = FakeServer(DATA, etag='"v1"')
+        monkeypatch.setattr(requests, 'get', server)
+        cache = response_cache.ResponseCache()
+        assert response_cache.fetch(cache, HEADERS, 0) == (DATA, True)
+        assert response_cache.fetch(cache, HEADERS, 0) == (DATA, False)
+        assert server.seen_headers[1]['If-None-Match'] == '"v1"', (
+            'Повторный запрос должен быть условным.'
+        )
+        stats = cache.stats()
+        assert stats['not_modified'] == 1
+        assert stats['hit_rate'] == 0.5
+        assert stats['bytes_saved'] > 0
+
+    def test_unchanged_body_without_validators(self, monkeypatch):
+        import response_cache
+
+        server = FakeServer(DATA)
+        monkeypatch.setattr(requests, 'get', server)
+        cache = response_cache.ResponseCache()
+        response_cache.fetch(cache, HEADERS, 0)
+        assert response_cache.fetch(cache, HEADERS, 0) == (DATA, False)
+        assert 'If-None-Match' not in server.seen_headers[1]
+        server.data = dict(DATA, current_date=11)
+        response, fresh = response_cache.fetch(cache, HEADERS, 0)
+        assert not fresh and response['current_date'] == 11, (
+            'Новое current_date без изменений в работах не должно '
+            'считаться изменением ответа.'
+        )
+        server.data = dict(DATA, homeworks=[
+            dict(DATA['homeworks'][0], status='rejected')])
+        assert response_cache.fetch(cache, HEADERS, 0)[1], (
+            'Изменившиеся работы должны обрабатываться заново.'
+        )
+        assert cache.stats()['unchanged_body'] == 2
+
+    def test_lru_eviction(self):
+        import response_cache
+
+        cache = response_cache.ResponseCache(maxsize=2)
+        for key in 'abc':
+            cache.put(key, response_cache.CacheEntry({}, b'', {}, 0))
+        assert cache.get('a') is None
+        assert cache.get('c') is not None
+
+    def test_engine_skips_unchanged_response(self, monkeypatch,
+                                             homework_module):
+        import engine
+        import response_cache
+        import subscriptions
+        from utils import RecordingBot
+
+        monkeypatch.setattr(requests, 'get', FakeServer(DATA, etag='"v1"'))
+        parsed = []
+        original = homework_module.check_response
+        monkeypatch.setattr(homework_module, 'check_response',
+                            lambda response: parsed.append(1) or original(
+                                response))
+        registry = subscriptions.SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        poller = engine.PollingEngine(registry, RecordingBot(),
+                                      cache=response_cache.ResponseCache())
+        poller.poll(subscription)
+        subscription.timestamp = 0
+        assert not poller.poll(subscription)
+        assert len(parsed) == 1, (
+            'Неизменный ответ не должен проверяться повторно.'
+        )
+
+    def test_failed_delivery_is_retried_on_unchanged_response(
+            self, monkeypatch, homework_module):
+        import engine
+        import response_cache
+        import subscriptions
+        from utils import RecordingBot
+
+        class FlakyBot(RecordingBot):
+            fail = True
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if self.fail:
+                    raise ConnectionError('Telegram недоступен')
+                super().send_message(chat_id, text)
+
+        monkeypatch.setattr(requests, 'get', FakeServer(DATA, etag='"v1"'))
+        registry = subscriptions.SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        bot = FlakyBot()
+        poller = engine.PollingEngine(registry, bot,
+                                      cache=response_cache.ResponseCache())
+        assert not poller.poll(subscription)
+        bot.fail = False
+        assert poller.poll(subscription), (
+            'Недоставленная смена статуса должна отправляться повторно, '
+            'даже если ответ API не изменился.'
+        )
+        assert len(bot.sent) == 1
+        assert poller.store.get_statuses(subscription.key) == {'1': 'approved'}
+        assert not poller.poll(subscription)
@@ -0,0 +1,164 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+
+import pytest
+import requests
+
+from utils import RecordingBot, mock_get_by_token
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.received.append(json.loads(self.rfile.read(length)))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sink():
+    SinkHandler.received = []
+    server = HTTPServer(('127.0.0.1', 0), SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/events', SinkHandler
+    server.shutdown()
+    server.server_close()
+
+
+class TestDestinations:
+    @pytest.mark.parametrize('entry, expected', [
+        (5, ('chat', 5)),
+        ('@mentors', ('chat', '@mentors')),
+        ({'chat_id': -100}, ('chat', -100)),
+        ({'webhook': 'http://localhost/x'}, ('webhook', 'http://localhost/x')),
+    ])
+    def test_parse_destination(self, entry, expected):
+        from subscriptions import parse_destination
+
+        assert tuple(parse_destination(entry)) == expected
+
+    @pytest.mark.parametrize('entry', [None, '', {}, {'url': 'x'}, [1]])
+    def test_invalid_destination(self, entry):
+        from subscriptions import parse_destination
+
+        with pytest.raises(ValueError):
+            parse_destination(entry)
+
+
+class TestFanOut:
+    def test_one_fetch_reaches_every_destination(self, monkeypatch,
+                                                 tmp_path, sink):
+        import engine
+        import subscriptions
+
+        url, handler = sink
+        path = tmp_path / 'subs.json'
+        path.write_text(json.dumps([{
+            'token': 'a', 'chat_id': 1,
+            'destinations': [2, {'chat_id': '@group'}, {'webhook': url}],
+        }]))
+        calls = []
+        mocked_get = mock_get_by_token({'a': 'approved'})
+
+        def counting_get(*args, **kwargs):
+            calls.append(kwargs['params'])
+            return mocked_get(*args, **kwargs)
+
+        monkeypatch.setattr(requests, 'get', counting_get)
+        registry = subscriptions.SubscriptionRegistry.from_file(path)
+        bot = RecordingBot()
+        poller = engine.PollingEngine(registry, bot)
+        subscription = registry.get(subscriptions.token_key('a'))
+        assert poller.poll(subscription)
+        poller.router.close()
+        assert len(calls) == 1, (
+            'Для всех адресатов токена должен выполняться один запрос к API.'
+        )
+        assert sorted(str(chat) for chat, _ in bot.sent) == [
+            '1', '2', '@group'
+        ]
+        assert [event['subscription'] for event in handler.received] == [
+            subscription.key
+        ], 'Уведомление должно дойти до HTTP-приёмника.'
+        assert handler.received[0]['text'] == bot.sent[0][1]
+        assert poller.router.stats() == {'routed': 3, 'failed': 0}
+
+    def test_failed_sink_does_not_block_cursor(self, monkeypatch):
+        import engine
+        import subscriptions
+
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'a': 'approved'}))
+        registry = subscriptions.SubscriptionRegistry()
+        subscription = registry.add('a', 1, destinations=[
+            subscriptions.Destination(subscriptions.WEBHOOK,
+                                      'http://127.0.0.1:9/closed')])
+        poller = engine.PollingEngine(registry, RecordingBot())
+        assert poller.poll(subscription)
+        poller.router.close()
+        assert subscription.timestamp == 100, (
+            'Сбой дополнительного адресата не должен задерживать курсор.'
+        )
+        assert poller.router.stats() == {'routed': 0, 'failed': 1}
+
+    def test_retries_go_only_to_primary_chat(self, monkeypatch):
+        import engine
+        import subscriptions
+
+        class PrimaryDownBot(RecordingBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if chat_id == 1:
+                    raise ConnectionError('Основной чат недоступен')
+                super().send_message(chat_id, text)
+
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(
+            {'a': 'approved'}))
+        registry = subscriptions.SubscriptionRegistry()
+        subscription = registry.add('a', 1, destinations=[
+            subscriptions.Destination(subscriptions.CHAT, 2)])
+        bot = PrimaryDownBot()
+        poller = engine.PollingEngine(registry, bot)
+        assert not poller.poll(subscription)
+        assert not poller.poll(subscription)
+        poller.router.close()
+        assert bot.sent == [(2, bot.sent[0][1])], (
+            'Пока основной чат недоступен, дополнительные адресаты не '
+            'должны получать уведомление повторно.'
+        )
+
+    def test_duplicate_token_is_polled_once(self, monkeypatch, tmp_path):
+        import engine
+        import subscriptions
+
+        path = tmp_path / 'subs.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1},
+            {'token': 'a', 'chat_id': 2},
+        ]))
+        calls = []
+        mocked_get = mock_get_by_token({'a': 'approved'})
+
+        def counting_get(*args, **kwargs):
+            calls.append(kwargs['params'])
+            return mocked_get(*args, **kwargs)
+
+        monkeypatch.setattr(requests, 'get', counting_get)
+        registry = subscriptions.SubscriptionRegistry.from_file(path)
+        bot = RecordingBot()
+        poller = engine.PollingEngine(registry, bot)
+        for subscription in registry:
+            poller.poll(subscription)
+        poller.router.close()
+        assert len(calls) == 1, (
+            'Записи с одним токеном должны опрашиваться одним запросом.'
+        )
+        assert sorted(chat for chat, _ in bot.sent) == [1, 2], (
+            'Уведомление должно дойти до чатов всех записей с этим токеном.'
+        )
+        assert registry.coalesced == 1
@@ -0,0 +1,39 @@
+class TestAdaptiveScheduler:
+    def make(self, **kwargs):
+        import scheduler
+
+        params = dict(min_interval=100, max_interval=1000, backoff=2,
+                      jitter=0, rand=lambda: 0.5)
+        params.update(kwargs)
+        return scheduler.AdaptiveScheduler(300, **params)
+
+    def test_idle_interval_grows_to_max(self):
+        planner = self.make()
+        delays = [planner.next_interval('a') for _ in range(5)]
+        assert delays == [300, 600, 1000, 1000, 1000], (
+            'При простое интервал должен расти до максимального.'
+        )
+
+    def test_reviewing_and_changes(self):
+        planner = self.make()
+        planner.next_interval('a')
+        planner.next_interval('a')
+        assert planner.next_interval('a', ['reviewing']) == 100, (
+            'Пока работа на проверке, опрос должен быть частым.'
+        )
+        assert planner.next_interval('a', ['approved'], changed=True) == 300
+
+    def test_jitter_stays_in_bounds(self):
+        planner = self.make(jitter=0.5, rand=lambda: 0.0)
+        assert planner.next_interval('a', ['reviewing']) == 100
+        planner = self.make(jitter=0.5, rand=lambda: 0.99)
+        assert 300 < planner.next_interval('a') <= 450
+
+    def test_report_counts_saved_requests(self):
+        planner = self.make()
+        for _ in range(4):
+            planner.next_interval('a')
+        report = planner.report()
+        assert report['polls'] == 4
+        assert report['fixed_polls'] == 10
+        assert report['saved'] == 6
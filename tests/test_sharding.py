@@ -0,0 +1,135 @@
+import pytest
+
+from utils import RecordingBot
+
+
+class TestHashRing:
+    def test_keys_are_spread_and_move_little(self):
+        from sharding import HashRing
+
+        keys = [f'key-{number}' for number in range(2000)]
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        before = {key: ring.node_for(key) for key in keys}
+        shares = [list(before.values()).count(node) for node in ring.nodes]
+        assert min(shares) > 300, (
+            'Ключи должны распределяться по узлам примерно поровну.'
+        )
+        ring.add('e')
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        assert all(ring.node_for(key) == 'e' for key in moved), (
+            'При добавлении узла ключи должны переезжать только на него.'
+        )
+        assert len(moved) < len(keys) / 3
+        ring.remove('e')
+        assert {key: ring.node_for(key) for key in keys} == before
+
+    def test_empty_ring(self):
+        from sharding import HashRing
+
+        assert HashRing().node_for('key') is None
+
+
+class TestSharedStore:
+    @pytest.mark.parametrize('path', [None, '', 'state.json'])
+    def test_shared_store_is_required(self, path, monkeypatch):
+        import homework
+        import sharding
+
+        monkeypatch.setattr(homework, 'STATE_STORE_PATH', path)
+        with pytest.raises(ValueError):
+            sharding.supervise(workers=0)
+        with pytest.raises(ValueError):
+            sharding.run_worker(0)
+        sharding.check_shared_store('state.sqlite3')
+
+
+class TestSqliteCoordinator:
+    def test_expired_workers_are_not_live(self, tmp_path):
+        from sharding import SqliteCoordinator
+
+        now = [0]
+        coordinator = SqliteCoordinator(tmp_path / 'shards.sqlite3', ttl=30,
+                                        clock=lambda: now[0])
+        coordinator.heartbeat('b')
+        coordinator.heartbeat('a')
+        assert coordinator.live_workers() == ['a', 'b']
+        now[0] = 20
+        coordinator.heartbeat('a')
+        now[0] = 40
+        assert coordinator.live_workers() == ['a'], (
+            'Воркер без отметки дольше ttl не должен считаться живым.'
+        )
+        coordinator.leave('a')
+        assert coordinator.live_workers() == []
+        coordinator.close()
+
+
+class TestShardWorker:
+    def make_source(self, count):
+        from subscriptions import SubscriptionRegistry
+
+        source = SubscriptionRegistry()
+        for number in range(count):
+            source.add(f'token-{number}', number + 1)
+        return source
+
+    def test_workers_split_and_take_over(self, tmp_path):
+        import state_store
+        from sharding import ShardWorker, SqliteCoordinator
+
+        source = self.make_source(50)
+        path = tmp_path / 'shards.sqlite3'
+        store = state_store.SqliteStateStore(tmp_path / 'state.sqlite3')
+        first = ShardWorker('a', source, SqliteCoordinator(path),
+                            RecordingBot(), store)
+        second = ShardWorker('b', source, SqliteCoordinator(path),
+                             RecordingBot(), store)
+        first.rebalance()
+        second.rebalance()
+        first.rebalance()
+        owned_a = set(first.registry.keys())
+        owned_b = set(second.registry.keys())
+        assert owned_a and owned_b and not owned_a & owned_b, (
+            'Воркеры должны делить подписки без пересечений.'
+        )
+        assert owned_a | owned_b == set(source.keys())
+
+        key = next(iter(owned_b))
+        store.record(key, 500)
+        second.coordinator.leave('b')
+        acquired, released = first.rebalance()
+        assert acquired == owned_b and not released, (
+            'После ухода воркера его подписки должны переехать.'
+        )
+        assert first.registry.get(key).timestamp == 500, (
+            'Подписка должна продолжить с сохранённого курсора.'
+        )
+
+    def test_reload_updates_owned_subscriptions(self, tmp_path,
+                                                monkeypatch):
+        import json
+
+        import engine
+        from sharding import ShardWorker, SqliteCoordinator
+        from subscriptions import token_key
+
+        path = tmp_path / 'subs.json'
+        path.write_text(json.dumps([{'token': 'token-0', 'chat_id': 1}]))
+        monkeypatch.setenv('SUBSCRIPTIONS_PATH', str(path))
+        source = self.make_source(1)
+        worker = ShardWorker('a', source, SqliteCoordinator(
+            tmp_path / 'shards.sqlite3'), RecordingBot())
+        worker.rebalance()
+        key = token_key('token-0')
+        worker.registry.get(key).timestamp = 700
+        path.write_text(json.dumps([
+            {'token': 'token-0', 'chat_id': 999, 'locale': 'en'}]))
+        assert engine.reload_subscriptions(source, worker.rebalance)
+        subscription = worker.registry.get(key)
+        assert subscription.chat_id == 999 and subscription.locale == 'en', (
+            'После перечитывания подписок воркер должен отправлять '
+            'уведомления в новый чат.'
+        )
+        assert subscription.timestamp == 700, (
+            'Обновление подписки не должно сбрасывать её курсор.'
+        )
@@ -0,0 +1,120 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+import requests
+
+import utils
+
+
+class TestGracefulShutdown:
+    def test_only_waiting_is_interrupted(self):
+        import exceptions
+        from shutdown import GracefulShutdown
+
+        shutdown = GracefulShutdown()
+        shutdown.handle_stop()
+        assert shutdown.stopping, (
+            'Сигнал вне ожидания должен только запоминать запрос остановки.'
+        )
+        with pytest.raises(exceptions.ShutdownRequested):
+            with shutdown.interruptible():
+                pass
+
+    def test_signal_interrupts_waiting(self):
+        import exceptions
+        from shutdown import GracefulShutdown
+
+        shutdown = GracefulShutdown()
+        with pytest.raises(exceptions.ShutdownRequested):
+            with shutdown.interruptible():
+                shutdown.handle_stop()
+        shutdown.handle_reload()
+        assert shutdown.take_reload()
+        assert not shutdown.take_reload(), (
+            'Запрос перезагрузки должен выполняться один раз.'
+        )
+
+
+class TestMainShutdown:
+    def test_sigterm_during_sleep_saves_state(self, monkeypatch, tmp_path,
+                                              homework_module):
+        import state_store
+        from subscriptions import token_key
+
+        path = tmp_path / 'state.json'
+
+        def mock_get(*args, **kwargs):
+            response = utils.MockResponseGET(random_timestamp=600)
+            response.json = lambda: {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 600,
+            }
+            return response
+
+        def sleep_until_signal(secs):
+            os.kill(os.getpid(), signal.SIGTERM)
+            raise AssertionError('Сигнал должен прервать ожидание.')
+
+        previous = signal.getsignal(signal.SIGTERM)
+        monkeypatch.setattr(requests, 'get', mock_get)
+        monkeypatch.setattr(time, 'sleep', sleep_until_signal)
+        monkeypatch.setattr(homework_module.telegram, 'Bot',
+                            lambda **kwargs: utils.MockTelegramBot())
+        monkeypatch.setattr(homework_module, 'STATE_STORE_PATH', str(path))
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abc')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+        homework_module.main()
+        assert signal.getsignal(signal.SIGTERM) is previous, (
+            'После остановки должны вернуться прежние обработчики сигналов.'
+        )
+        state = json.loads(path.read_text())
+        assert state['cursors'] == {token_key('sometoken'): 600}, (
+            'При остановке бот должен сохранить курсор.'
+        )
+        restored = state_store.open_store(path)
+        assert restored.get_statuses(token_key('sometoken')) == {
+            'hw': 'approved'
+        }
+
+
+class TestRunUntilSignal:
+    def test_reload_and_stop(self):
+        import shutdown
+
+        stopped = threading.Event()
+        reloads = []
+
+        def send_signals():
+            time.sleep(0.1)
+            os.kill(os.getpid(), signal.SIGHUP)
+            time.sleep(0.1)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        threading.Thread(target=send_signals).start()
+        shutdown.run_until_signal(lambda: stopped.wait(5), stopped.set,
+                                  lambda: reloads.append(True),
+                                  interval=0.02)
+        assert stopped.is_set(), 'По SIGTERM должен вызываться stop().'
+        assert reloads == [True], 'По SIGHUP должен вызываться reload().'
+
+
+class TestRegistryMerge:
+    def test_merge_adds_updates_and_removes(self):
+        from subscriptions import SubscriptionRegistry
+
+        registry = SubscriptionRegistry()
+        registry.add('old', 1)
+        registry.add('kept', 2)
+        fresh = SubscriptionRegistry()
+        fresh.add('kept', 3)
+        fresh.add('new', 4)
+        assert registry.merge(fresh) == (1, 1)
+        chats = sorted(item.chat_id for item in registry)
+        assert chats == [3, 4], (
+            'Реестр должен совпасть с перечитанными подписками.'
+        )
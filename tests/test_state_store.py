@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import time
+
+import pytest
+import requests
+
+import utils
+
+
+@pytest.fixture(params=['state.json', 'state.sqlite3'])
+def store_path(request, tmp_path):
+    return tmp_path / request.param
+
+
+class TestStateStore:
+    def test_round_trip(self, store_path):
+        import state_store
+
+        store = state_store.open_store(store_path)
+        store.record('tenant', 1000, {'1': 'reviewing'})
+        store.record('tenant', 2000, {'1': 'approved', '2': 'reviewing'},
+                     {'2': 'hw_2'})
+        store.close()
+
+        restored = state_store.open_store(store_path)
+        assert restored.get_cursor('tenant') == 2000
+        assert restored.get_statuses('tenant') == {
+            '1': 'approved', '2': 'reviewing'
+        }
+        assert restored.get_names('tenant') == {'2': 'hw_2'}, (
+            'Названия работ должны сохраняться рядом со статусами.'
+        )
+        assert restored.get_cursor('unknown') == 0
+        restored.close()
+
+    def test_flush_is_batched(self, store_path):
+        import state_store
+
+        now = [0]
+        store = state_store.open_store(store_path, batch_size=3,
+                                       flush_interval=60,
+                                       clock=lambda: now[0])
+        store.record('a', 1)
+        store.record('b', 2)
+        assert state_store.open_store(store_path).get_cursor('a') == 0, (
+            'Изменения должны сбрасываться пачкой, а не по одному.'
+        )
+        store.record('c', 3)
+        assert state_store.open_store(store_path).get_cursor('a') == 1
+        store.record('d', 4)
+        now[0] = 61
+        assert store.maybe_flush()
+        assert state_store.open_store(store_path).get_cursor('d') == 4
+
+    def test_reload_reads_other_process_changes(self, store_path):
+        import state_store
+
+        reader = state_store.open_store(store_path)
+        writer = state_store.open_store(store_path, batch_size=1)
+        writer.record('a', 10, {'1': 'approved'})
+        assert reader.get_cursor('a') == 0
+        reader.reload(['a'])
+        assert reader.get_cursor('a') == 10, (
+            'reload() должен перечитывать курсор, сохранённый другим '
+            'процессом.'
+        )
+        assert reader.get_statuses('a') == {'1': 'approved'}
+
+    def test_failed_write_is_retried(self, tmp_path):
+        import state_store
+
+        store = state_store.open_store(tmp_path / 'state.sqlite3',
+                                       batch_size=1)
+        original = store._write
+        failures = []
+
+        def locked_write(dirty):
+            failures.append(set(dirty))
+            raise sqlite3.OperationalError('database is locked')
+
+        store._write = locked_write
+        store.record('a', 5, {'1': 'reviewing'})
+        assert failures == [{'a'}], (
+            'Ошибка записи не должна выбрасываться из record().'
+        )
+        store._write = original
+        store.record('b', 7)
+        store.close()
+        reopened = state_store.open_store(tmp_path / 'state.sqlite3')
+        assert reopened.get_cursor('a') == 5, (
+            'Изменения после неудачной записи должны сохраниться позже.'
+        )
+        assert reopened.get_statuses('a') == {'1': 'reviewing'}
+        reopened.close()
+
+    def test_json_write_is_atomic(self, tmp_path):
+        import state_store
+
+        path = tmp_path / 'state.json'
+        store = state_store.open_store(path, batch_size=1)
+        store.record('a', 1)
+        assert json.loads(path.read_text())['cursors'] == {'a': 1}
+        assert [item.name for item in tmp_path.iterdir()] == ['state.json']
+
+
+class TestMainRestoresCursor:
+    def test_main_starts_from_saved_cursor(self, monkeypatch, tmp_path,
+                                           homework_module):
+        import state_store
+        from subscriptions import token_key
+
+        path = tmp_path / 'state.json'
+        store = state_store.open_store(path)
+        store.record(token_key('sometoken'), 555)
+        store.close()
+
+        requested = []
+
+        def mock_get(*args, params=None, **kwargs):
+            requested.append(params['from_date'])
+            return utils.MockResponseGET(random_timestamp=600)
+
+        def sleep_to_interrupt(secs):
+            raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+        monkeypatch.setattr(homework_module.telegram, 'Bot',
+                            lambda **kwargs: utils.MockTelegramBot())
+        monkeypatch.setattr(homework_module, 'STATE_STORE_PATH', str(path))
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abc')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+        assert requested == [555], (
+            'После перезапуска бот должен продолжать с сохранённого курсора.'
+        )
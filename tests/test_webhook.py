@@ -0,0 +1,116 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils import RecordingBot
+
+
+def make_update(chat_id, text, update_id=1):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text,
+        },
+    }
+
+
+def make_responder():
+    import state_store
+    import webhook
+    from subscriptions import SubscriptionRegistry
+
+    registry = SubscriptionRegistry()
+    subscription = registry.add('token', 42)
+    store = state_store.MemoryStateStore()
+    store.record(subscription.key, 100, {'7': 'reviewing'}, {'7': 'hw_7'})
+    return webhook.CommandResponder(registry, store)
+
+
+class TestCommandResponder:
+    def test_status_is_answered_from_store(self):
+        import homework
+
+        reply = make_responder().answer(42, '/status')
+        assert reply == 'Работа hw_7: ' + homework.HOMEWORK_VERDICTS[
+            'reviewing'], (
+            'Команда /status должна отвечать из локального хранилища '
+            'с названиями работ.'
+        )
+
+    def test_destination_chat_is_subscribed(self):
+        import state_store
+        import webhook
+        from subscriptions import CHAT, Destination, SubscriptionRegistry
+
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 42, destinations=[
+            Destination(CHAT, -100)])
+        store = state_store.MemoryStateStore()
+        store.record(subscription.key, 100, {'7': 'reviewing'},
+                     {'7': 'hw_7'})
+        reply = webhook.CommandResponder(registry, store).answer(
+            -100, '/status')
+        assert reply.startswith('Работа hw_7: '), (
+            'Чат дополнительного адресата должен получать ответ на /status.'
+        )
+
+    def test_history_and_unknown_chat(self):
+        responder = make_responder()
+        assert 'работ отслеживается: 1' in responder.answer(
+            42, '/history@homework_bot')
+        assert responder.answer(1, '/status') == (
+            'Этот чат не подписан на статусы домашних работ.'
+        )
+        assert responder.answer(42, 'привет') is None, (
+            'Обычные сообщения не должны получать ответ.'
+        )
+
+
+class TestWebhookServer:
+    def post(self, server, data, headers=None):
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{server.port}{server.path}',
+            data=json.dumps(data).encode(), headers=headers or {},
+            method='POST')
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+
+    def test_update_is_answered_by_worker(self):
+        import webhook
+
+        bot = RecordingBot()
+        server = webhook.WebhookServer(make_responder(), bot, port=0,
+                                       secret=None)
+        server.start()
+        try:
+            assert self.post(server, make_update(42, '/status')) == 200
+            server.join()
+        finally:
+            server.stop()
+        assert len(bot.sent) == 1 and bot.sent[0][0] == 42, (
+            'Ответ на команду должен уйти в чат пользователя.'
+        )
+        assert server.stats()['answered'] == 1
+
+    def test_wrong_secret_is_rejected(self):
+        import webhook
+
+        bot = RecordingBot()
+        server = webhook.WebhookServer(make_responder(), bot, port=0,
+                                       secret='secret')
+        server.start()
+        try:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                self.post(server, make_update(42, '/status'),
+                          {webhook.SECRET_HEADER: 'wrong'})
+        finally:
+            server.stop()
+        assert error.value.code == 403
+        assert bot.sent == [], (
+            'Обновления без секрета не должны обрабатываться.'
+        )
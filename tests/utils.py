@@ -3,6 +3,7 @@ from collections import namedtuple
 from contextlib import contextmanager
 from http import HTTPStatus
 from inspect import signature
+import threading
 from types import ModuleType
 
 
@@ -101,5 +102,38 @@ class MockTelegramBot:
         self.text = text
 
 
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        with self.lock:
+            self.sent.append((chat_id, text))
+
+
+def mock_get_by_token(statuses, gates=None):
+    gates = gates or {}
+
+    def mocked_get(*args, headers=None, params=None, **kwargs):
+        token = headers['Authorization'].split(' ', 1)[1]
+        if token in gates:
+            gates[token].wait(5)
+        response = MockResponseGET(*args, random_timestamp=100)
+
+        def mock_json():
+            return {
+                'homeworks': [
+                    {'homework_name': f'hw_{token}',
+                     'status': statuses[token]}
+                ],
+                'current_date': 100
+            }
+
+        response.json = mock_json
+        return response
+    return mocked_get
+
+
 class BreakInfiniteLoop(Exception):
     pass
@@ -0,0 +1,323 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import queue
+import threading
+
+from dotenv import load_dotenv
+import telegram
+
+import homework
+import metrics
+import rendering
+from subscriptions import CHAT
+
+
+load_dotenv()
+
+
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 0))
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', 2))
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', 1000))
+WEBHOOK_MAX_BODY = 1024 * 1024
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+HELP = ('Команды:\n'
+        '/status - последние статусы ваших работ\n'
+        '/history - последние смены статусов и время на проверке')
+NOT_SUBSCRIBED = 'Этот чат не подписан на статусы домашних работ.'
+NO_STATUSES = 'Бот пока не получил ни одного статуса работ.'
+NO_HISTORY = 'Обновлений статусов пока не было.'
+STATUS_LINE = 'Работа {}: {}'
+HISTORY_LINE = 'Последнее обновление: {}, работ отслеживается: {}'
+TRANSITION_LINE = '{} - работа {}: {}'
+REVIEW_TIME_LINE = 'Работа {} на проверке: {}'
+UNKNOWN_COMMAND = 'Неизвестная команда {}. ' + HELP
+WEBHOOK_STARTED = 'Приём команд доступен на http://{}:{}{}'
+WEBHOOK_QUEUE_FULL = 'Очередь команд переполнена, обновление {} пропущено'
+COMMAND_ERROR = 'Сбой обработки команды {}: {}'
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(' ')
+
+
+class CommandResponder:
+    """.
+    Отвечает на команды пользователей из локального хранилища состояния,
+    не обращаясь к API Практикума.
+    """
+
+    def __init__(self, registry, store, renderer=None, history=None):
+        self.registry = registry
+        self.store = store
+        self.renderer = renderer or rendering.get_renderer()
+        self.status_history = history
+        self.commands = {
+            '/start': self.help,
+            '/help': self.help,
+            '/status': self.status,
+            '/history': self.history,
+        }
+
+    def answer(self, chat_id, text):
+        """Возвращает ответ на команду или None, если это не команда."""
+        if not text or not text.startswith('/'):
+            return None
+        command = text.split()[0].split('@')[0].lower()
+        handler = self.commands.get(command)
+        metrics.COMMANDS.inc(command if handler else 'unknown')
+        if handler is None:
+            return UNKNOWN_COMMAND.format(command)
+        return handler(chat_id)
+
+    def subscriptions(self, chat_id):
+        """.
+        Возвращает подписки, в которых чат основной или дополнительный
+        адресат.
+        """
+        chat_id = str(chat_id)
+        return [subscription for subscription in self.registry
+                if str(subscription.chat_id) == chat_id
+                or any(destination.kind == CHAT
+                       and str(destination.address) == chat_id
+                       for destination in subscription.destinations)]
+
+    def help(self, chat_id):
+        """Список команд."""
+        return HELP
+
+    def status(self, chat_id):
+        """Последние отправленные статусы работ чата."""
+        subscriptions = self.subscriptions(chat_id)
+        if not subscriptions:
+            return NOT_SUBSCRIBED
+        lines = []
+        for subscription in subscriptions:
+            names = self.store.get_names(subscription.key)
+            lines.extend(
+                STATUS_LINE.format(names.get(work, work),
+                                   self.verdict(status, subscription.locale))
+                for work, status in self.store.get_statuses(
+                    subscription.key).items())
+        return homework.UPDATE_SEPARATOR.join(lines) or NO_STATUSES
+
+    def verdict(self, status, locale=None):
+        """Вердикт для статуса на языке подписки или сам статус."""
+        try:
+            return self.renderer.verdict(status, locale)
+        except ValueError:
+            return status
+
+    def history(self, chat_id):
+        """.
+        Время последнего обновления и число отслеживаемых работ, а при
+        включённом журнале - последние смены статусов и время на проверке.
+        """
+        subscriptions = self.subscriptions(chat_id)
+        if not subscriptions:
+            return NOT_SUBSCRIBED
+        lines = []
+        for subscription in subscriptions:
+            cursor = self.store.get_cursor(subscription.key)
+            if cursor:
+                lines.append(HISTORY_LINE.format(
+                    _format_time(cursor),
+                    len(self.store.get_statuses(subscription.key))))
+            if self.status_history is not None:
+                lines.extend(self.timeline(subscription))
+        return homework.UPDATE_SEPARATOR.join(lines) or NO_HISTORY
+
+    def timeline(self, subscription):
+        """Строки последних смен статусов подписки из журнала."""
+        transitions = self.status_history.last_transitions(subscription.key)
+        lines = [
+            TRANSITION_LINE.format(_format_time(transition.changed_at),
+                                   transition.name,
+                                   self.verdict(transition.status,
+                                                subscription.locale))
+            for transition in transitions
+        ]
+        works = dict.fromkeys(transition.name for transition in transitions)
+        for work in works:
+            seconds = self.status_history.time_in_status(subscription.key,
+                                                         work)
+            if seconds:
+                lines.append(REVIEW_TIME_LINE.format(
+                    work, timedelta(seconds=int(seconds))))
+        return lines
+
+
+class WebhookServer:
+    """.
+    Принимает обновления Telegram по HTTP и передаёт их в ограниченную
+    очередь, которую разбирают фоновые потоки. HTTP-ответ отдаётся сразу,
+    поэтому медленная отправка ответа не задерживает Telegram.
+    """
+
+    def __init__(self, responder, bot, outbox=None, host=WEBHOOK_HOST,
+                 port=WEBHOOK_PORT, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET,
+                 workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE):
+        self.responder = responder
+        self.bot = bot
+        self.outbox = outbox
+        self.path = path
+        self.secret = secret
+        self.workers = workers
+        self.counters = dict.fromkeys(
+            ('received', 'answered', 'dropped', 'rejected'), 0)
+        self._queue = queue.Queue(queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+
+    @property
+    def port(self):
+        """Порт, на котором слушает сервер."""
+        return self.httpd.server_port
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(WebhookHandler):
+            webhook = server
+
+        return Handler
+
+    def submit(self, data):
+        """Ставит обновление в очередь, возвращает False при переполнении."""
+        self._count('received')
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self._count('dropped')
+            logging.warning(WEBHOOK_QUEUE_FULL.format(data.get('update_id')))
+            return False
+        return True
+
+    def handle(self, data):
+        """Разбирает обновление и отправляет ответ на команду."""
+        update = telegram.Update.de_json(data, self.bot)
+        message = update.effective_message if update else None
+        if message is None or message.text is None:
+            return False
+        reply = self.responder.answer(message.chat_id, message.text)
+        if reply is None:
+            return False
+        if self.outbox is not None:
+            self.outbox.submit(message.chat_id, reply)
+        else:
+            homework.send_to_chat(self.bot, message.chat_id, reply)
+        self._count('answered')
+        return True
+
+    def start(self):
+        """Запускает HTTP-сервер и потоки обработки."""
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True,
+                                      name=f'webhook-{number}')
+            thread.start()
+            self._threads.append(thread)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                         name='webhook-http').start()
+
+    def stop(self, timeout=None):
+        """Останавливает приём и дожидается разбора очереди."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def join(self):
+        """Ждёт, пока очередь обновлений опустеет."""
+        self._queue.join()
+
+    def stats(self):
+        """Возвращает счётчики обновлений и глубину очереди."""
+        with self._lock:
+            stats = dict(self.counters)
+        stats['depth'] = self._queue.qsize()
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _work(self):
+        while True:
+            data = self._queue.get()
+            try:
+                if data is None:
+                    return
+                self.handle(data)
+            except Exception as error:
+                logging.error(COMMAND_ERROR.format(data.get('update_id'),
+                                                   error))
+            finally:
+                self._queue.task_done()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Принимает POST-запросы Telegram с обновлениями."""
+
+    webhook = None
+
+    def do_POST(self):
+        webhook = self.webhook
+        if self.path.split('?')[0] != webhook.path:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        if webhook.secret and (self.headers.get(SECRET_HEADER)
+                               != webhook.secret):
+            webhook._count('rejected')
+            self.send_error(HTTPStatus.FORBIDDEN)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > WEBHOOK_MAX_BODY:
+            self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        try:
+            data = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(HTTPStatus.BAD_REQUEST)
+            return
+        if not isinstance(data, dict):
+            self.send_error(HTTPStatus.BAD_REQUEST)
+            return
+        webhook.submit(data)
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(registry, store, bot, outbox=None, history=None,
+          port=WEBHOOK_PORT, url=WEBHOOK_URL):
+    """.
+    Запускает приём команд, если задан порт, и регистрирует адрес
+    WEBHOOK_URL в Telegram. Без порта ничего не делает и возвращает None.
+    """
+    if not port:
+        return None
+    server = WebhookServer(CommandResponder(registry, store, history=history),
+                           bot, outbox, port=port)
+    server.start()
+    if url:
+        api_kwargs = {'secret_token': server.secret} if server.secret else None
+        bot.set_webhook(url.rstrip('/') + server.path, api_kwargs=api_kwargs)
+    logging.info(WEBHOOK_STARTED.format(WEBHOOK_HOST, server.port,
+                                        server.path))
+    return server